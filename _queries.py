@@ -0,0 +1,35 @@
+"""Shared Cloud Logging / BigQuery query literals for the verify scripts.
+
+verify_analytics.py and verify_bigquery_setup.py used to carry their own
+copies of these strings; one definition keeps the two scripts in lockstep
+and allocates each literal once at import.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Final
+
+_CLOUD_LOG_EVENTS_TEMPLATE: Final[str] = '''
+resource.type="cloud_run_revision"
+AND resource.labels.service_name="askbucky"
+AND jsonPayload.type="event"
+AND timestamp>="{since}"
+'''
+
+
+def cloud_log_events_filter(hours: int = 1) -> str:
+    """Events filter bounded to a rolling window ending now.
+
+    The filter used to hardcode an absolute date, so its scan set grew
+    monotonically; a rolling cutoff keeps the query bounded and matches
+    the one-hour window the BigQuery SQL already uses.
+    """
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    return _CLOUD_LOG_EVENTS_TEMPLATE.format(
+        since=since.strftime('%Y-%m-%dT%H:%M:%SZ'))
+
+BQ_EVENT_COUNT_SQL: Final[str] = '''
+SELECT COUNT(*) as event_count
+FROM `askbucky-469317.askbucky_analytics._AllLogs`
+WHERE jsonPayload.type = 'event'
+  AND TIMESTAMP(jsonPayload.event_time) >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 1 HOUR)
+'''
@@ -7,6 +7,42 @@ import os
 import asyncio
 from dotenv import load_dotenv
 from qdrant_client import AsyncQdrantClient
+from qdrant_client import models
+
+
+async def get_sites(client: AsyncQdrantClient, collection_name: str) -> set:
+    """Get the distinct 'site' payload values in a collection.
+
+    Prefers the server-side facet API (single round-trip, no payload
+    transfer); falls back to paginated scrolls that project only the
+    'site' field for older Qdrant servers.
+    """
+    try:
+        resp = await client.facet(
+            collection_name=collection_name,
+            key="site",
+            limit=1000
+        )
+        return {hit.value for hit in resp.hits}
+    except Exception:
+        pass
+
+    sites = set()
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=collection_name,
+            limit=10_000,
+            with_payload=models.PayloadSelectorInclude(include=["site"]),
+            with_vectors=False,
+            offset=offset
+        )
+        sites.update(p.payload['site'] for p in points
+                     if p.payload and 'site' in p.payload)
+        if offset is None:
+            break
+    return sites
+
 
 async def check_qdrant_data():
     """Check what collections and data are in Qdrant Cloud"""
@@ -29,37 +65,35 @@ async def check_qdrant_data():
         # Get all collections
         collections = await client.get_collections()
         print(f"\n📚 Found {len(collections.collections)} collections:")
-        
-        for collection in collections.collections:
-            print(f"   - {collection.name}")
-            
-            # Get collection info
-            info = await client.get_collection(collection.name)
-            print(f"     Points: {info.points_count}")
-            
-            # Get a sample of points to see what sites are available
-            if info.points_count > 0:
-                try:
-                    # Get first few points to see the data structure
-                    points = await client.scroll(
-                        collection_name=collection.name,
-                        limit=5,
-                        with_payload=True,
-                        with_vectors=False
-                    )
-                    
-                    print(f"     Sample sites found:")
-                    sites = set()
-                    for point in points[0]:
-                        if point.payload and 'site' in point.payload:
-                            sites.add(point.payload['site'])
-                    
-                    for site in sorted(sites):
-                        print(f"       - {site}")
-                        
-                except Exception as e:
-                    print(f"     Error getting sample data: {e}")
-            
+
+        # Inspect collections concurrently; each inspection is an
+        # independent pair of round-trips
+        semaphore = asyncio.Semaphore(8)
+
+        async def inspect_collection(collection) -> list[str]:
+            lines = [f"   - {collection.name}"]
+            async with semaphore:
+                info = await client.get_collection(collection.name)
+                lines.append(f"     Points: {info.points_count}")
+
+                # Aggregate distinct sites server-side instead of sampling points
+                if info.points_count > 0:
+                    try:
+                        sites = await get_sites(client, collection.name)
+
+                        lines.append(f"     Sites found:")
+                        for site in sorted(sites):
+                            lines.append(f"       - {site}")
+
+                    except Exception as e:
+                        lines.append(f"     Error getting site data: {e}")
+            return lines
+
+        results = await asyncio.gather(
+            *[inspect_collection(c) for c in collections.collections]
+        )
+        for lines in results:
+            print("\n".join(lines))
             print()
         
     except Exception as e:
@@ -5,15 +5,18 @@ CORRECTED Analytics module for AskBucky - Privacy-friendly product analytics
 This version uses the proper aiohttp middleware pattern.
 """
 
+import asyncio
 import os
-import json
+import secrets
+import sys
 import time
-import uuid
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 from aiohttp import web
 import logging
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
 # Configuration constants
@@ -22,13 +25,178 @@ COOKIE_SID = "ab_sid"
 SESSION_TTL = 30 * 60  # 30 minutes
 COOKIE_MAX_AGE = 31536000  # 1 year for user ID
 
+# Buffered stdout writer so each event costs a memcpy, not a write() syscall.
+# Cloud Logging ingests line-delimited JSON either way; a periodic flush keeps
+# delivery latency bounded at FLUSH_INTERVAL.
+FLUSH_INTERVAL = 0.2  # seconds
+
+try:
+    _out = os.fdopen(sys.stdout.fileno(), "wb", buffering=64 * 1024, closefd=False)
+except (OSError, ValueError, AttributeError):
+    # stdout is not a real file (e.g. captured in tests) - fall back to the
+    # text stream so events still come out somewhere
+    _out = None
+
+_flush_task: Optional[asyncio.Task] = None
+
+
+async def _flush_periodically() -> None:
+    """Flush the buffered stdout writer every FLUSH_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        try:
+            _out.flush()
+        except Exception as e:
+            logger.debug(f"Could not flush analytics output: {e}")
+
+
+def _ensure_flush_task() -> None:
+    """Start the periodic flush task if an event loop is running"""
+    global _flush_task
+    if _flush_task is not None and not _flush_task.done():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    _flush_task = loop.create_task(_flush_periodically())
+
+
+def _write_events(events) -> None:
+    """Serialize events and write them as newline-delimited JSON"""
+    data = b"".join(orjson.dumps(e) + b"\n" for e in events)
+    if _out is not None:
+        _out.write(data)
+    else:
+        sys.stdout.write(data.decode("utf-8"))
+
+
+class EventBatcher:
+    """
+    Queue-backed batcher that moves event serialization and I/O off the
+    request critical path.
+
+    Handlers enqueue events in O(1); a single background task drains the
+    queue and writes whole batches at once. Events are dropped (and counted)
+    rather than blocking a request when the queue is full.
+    """
+
+    def __init__(self, max_queue: int = 10000, max_batch: int = 256,
+                 max_wait: float = 0.05):
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the drain task on the running event loop (idempotent)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.get_running_loop().create_task(self.run())
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def put(self, event: Dict[str, Any]) -> bool:
+        """Enqueue an event without blocking; returns False if dropped"""
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def run(self) -> None:
+        """Drain the queue forever, writing events in batches"""
+        while True:
+            batch = [await self._queue.get()]
+            # Gather whatever else arrives within max_wait, up to max_batch
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                _write_events(batch)
+            except Exception as e:
+                logger.error(f"Failed to write analytics batch: {e}")
+
+
+_batcher = EventBatcher()
+
+
+async def on_startup(app) -> None:
+    """aiohttp on_startup hook: start the event batcher and flush task"""
+    _batcher.start()
+    _ensure_flush_task()
+
 # UTM parameter tracking
 UTM_PARAMS = ['utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content']
 
+# Prebuilt defaults so extract_utm_params only pays a dict copy per call
+# Paths the middleware never tracks as page views; str.startswith takes a
+# tuple, so one call covers all prefixes
+_SKIP_PREFIXES = ('/ask', '/api/', '/health')
+
+_UTM_DEFAULT = {
+    'utm_source': 'direct',
+    'utm_medium': '(none)',
+    'utm_campaign': '(none)',
+    'utm_term': '(none)',
+    'utm_content': '(none)'
+}
+
+
+# Cache the formatted timestamp for the current second; every event logged
+# within the same second reuses one string instead of reformatting
+_ts_cache: tuple[int, str] = (0, "")
+
 
 def _now_iso() -> str:
-    """Get current time in ISO format with Z suffix"""
-    return datetime.utcnow().isoformat(timespec="seconds") + "Z"
+    """Get current time in ISO format with Z suffix (cached per second)"""
+    global _ts_cache
+    now = int(time.time())
+    if now != _ts_cache[0]:
+        _ts_cache = (now, time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now)))
+    return _ts_cache[1]
+
+
+def _set_cookies(response, cookies) -> None:
+    """
+    Set a batch of cookies with the shared security attributes
+
+    Skips responses that can't carry cookies: ones without set_cookie or
+    already prepared (headers sent).
+
+    Args:
+        response: The response object to set cookies on (any type)
+        cookies: Iterable of (name, value, max_age) tuples
+    """
+    if getattr(response, 'prepared', False):
+        return
+    set_cookie = getattr(response, 'set_cookie', None)
+    if set_cookie is None:
+        return
+    try:
+        for name, value, max_age in cookies:
+            set_cookie(
+                name,
+                value,
+                max_age=max_age,
+                httponly=True,
+                secure=True,
+                samesite="Lax"
+            )
+    except Exception as e:
+        logger.debug(f"Could not set cookies: {e}")
 
 
 def get_or_set_ids(request: web.Request, response) -> tuple[str, str]:
@@ -42,51 +210,52 @@ def get_or_set_ids(request: web.Request, response) -> tuple[str, str]:
     Returns:
         tuple: (user_id, session_id)
     """
+    # Reuse IDs resolved earlier in this request (e.g. page view + ask
+    # answered) instead of re-parsing cookies and re-setting them
+    try:
+        cached = request.get('_ab_ids')
+    except Exception:
+        cached = None
+    if cached:
+        return cached
+
     # Get existing user ID or create new one
     uid = request.cookies.get(COOKIE_UID)
     if not uid:
-        uid = f"ab_{uuid.uuid4().hex[:16]}"
+        # token_hex(8) gives the same 16 hex chars we kept from uuid4().hex
+        # without building and truncating a full UUID
+        uid = f"ab_{secrets.token_hex(8)}"
     
     # Get existing session ID
     sid = request.cookies.get(COOKIE_SID)
-    
+
     # Check if session is still valid (simple rolling session)
     now = int(time.time())
     if sid:
-        try:
-            # Extract timestamp from session ID (format: sess_timestamp)
-            ts = int(sid.rsplit("_", 1)[-1])
-            if now - ts > SESSION_TTL:
-                sid = None
-        except (ValueError, IndexError):
+        # Cookie format is sess_<timestamp>; the fixed-offset slice avoids
+        # an rsplit allocation per request. isdigit() also rejects legacy
+        # sess_<ts>_<ts> cookies, which int() would otherwise parse - it
+        # accepts "_" as a digit separator - into a far-future timestamp
+        # that never expires.
+        ts_part = sid[5:]
+        if not ts_part.isdigit() or now - int(ts_part) > SESSION_TTL:
             sid = None
-    
+
     # Create new session if needed
     if not sid:
         sid = f"sess_{now}"
     
-    # Set/refresh cookies - only if response supports it
+    # Set/refresh cookies - only if response can still carry them
+    _set_cookies(response, (
+        (COOKIE_UID, uid, COOKIE_MAX_AGE),
+        (COOKIE_SID, sid, SESSION_TTL)
+    ))
+
     try:
-        if hasattr(response, 'set_cookie'):
-            response.set_cookie(
-                COOKIE_UID, 
-                uid, 
-                max_age=COOKIE_MAX_AGE, 
-                httponly=True, 
-                secure=True, 
-                samesite="Lax"
-            )
-            response.set_cookie(
-                COOKIE_SID, 
-                f"{sid}_{now}", 
-                max_age=SESSION_TTL, 
-                httponly=True, 
-                secure=True, 
-                samesite="Lax"
-            )
-    except Exception as e:
-        logger.debug(f"Could not set cookies: {e}")
-    
+        request['_ab_ids'] = (uid, sid)
+    except Exception:
+        pass
+
     return uid, sid
 
 
@@ -100,27 +269,28 @@ def extract_utm_params(request: web.Request) -> Dict[str, str]:
     Returns:
         dict: UTM parameters with default values
     """
-    utm_data = {
-        'utm_source': 'direct',
-        'utm_medium': '(none)',
-        'utm_campaign': '(none)',
-        'utm_term': '(none)',
-        'utm_content': '(none)'
-    }
-    
-    # First check query parameters (for new visits)
+    try:
+        cached = request.get('_ab_utm')
+    except Exception:
+        cached = None
+    if cached is not None:
+        return cached
+
+    utm_data = _UTM_DEFAULT.copy()
+
+    # Query parameters (new visits) win over cookies (returning visits)
+    query = request.query
+    cookies = request.cookies
     for param in UTM_PARAMS:
-        value = request.query.get(param)
+        value = query.get(param) or cookies.get(param)
         if value:
             utm_data[param] = value
-    
-    # Then check cookies (for returning visits)
-    for param in UTM_PARAMS:
-        if utm_data[param] in ['direct', '(none)']:
-            cookie_value = request.cookies.get(param)
-            if cookie_value:
-                utm_data[param] = cookie_value
-    
+
+    try:
+        request['_ab_utm'] = utm_data
+    except Exception:
+        pass
+
     return utm_data
 
 
@@ -132,23 +302,12 @@ def set_utm_cookies(request: web.Request, response) -> None:
         request: The aiohttp request object
         response: The response object to set cookies on (any type)
     """
-    try:
-        if not hasattr(response, 'set_cookie'):
-            return
-            
-        for param in UTM_PARAMS:
-            value = request.query.get(param)
-            if value:
-                response.set_cookie(
-                    param,
-                    value,
-                    max_age=COOKIE_MAX_AGE,
-                    httponly=True,
-                    secure=True,
-                    samesite="Lax"
-                )
-    except Exception as e:
-        logger.debug(f"Could not set UTM cookies: {e}")
+    query = request.query
+    _set_cookies(response, (
+        (param, value, COOKIE_MAX_AGE)
+        for param in UTM_PARAMS
+        if (value := query.get(param))
+    ))
 
 
 def log_event(event_name: str, user_id: str, session_id: str, **props) -> None:
@@ -170,14 +329,55 @@ def log_event(event_name: str, user_id: str, session_id: str, **props) -> None:
         "props": props
     }
     
-    # Print to stdout as single-line JSON for Cloud Logging
+    # Hand off to the batcher when a loop is running; otherwise (one-off
+    # scripts, tests) serialize and write inline
     try:
-        print(json.dumps(event, ensure_ascii=False), flush=True)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            _write_events((event,))
+            if _out is not None:
+                _out.flush()
+            return
+        if not _batcher.running:
+            _batcher.start()
+            _ensure_flush_task()
+        if not _batcher.put(event):
+            logger.debug(f"Analytics queue full; dropped event ({_batcher.dropped} total)")
     except Exception as e:
         logger.error(f"Failed to log analytics event: {e}")
 
 
-def log_page_view(request: web.Request, response, 
+def log_events_bulk(events) -> None:
+    """
+    Log a pre-built batch of analytics events in one pass
+
+    Events are dicts in the shape log_event produces. With a running loop
+    they are enqueued on the batcher; otherwise the whole batch is
+    serialized and written with a single call instead of one write per event.
+
+    Args:
+        events: Iterable of event dicts
+    """
+    try:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            _write_events(events)
+            if _out is not None:
+                _out.flush()
+            return
+        if not _batcher.running:
+            _batcher.start()
+            _ensure_flush_task()
+        for event in events:
+            if not _batcher.put(event):
+                logger.debug(f"Analytics queue full; dropped event ({_batcher.dropped} total)")
+    except Exception as e:
+        logger.error(f"Failed to log analytics batch: {e}")
+
+
+def log_page_view(request: web.Request, response,
                  path: str = "/", sitetag: Optional[str] = None) -> None:
     """
     Log a page view event
@@ -223,17 +423,14 @@ async def analytics_middleware(request: web.Request, handler):
     Returns:
         The response from the handler
     """
-    start_time = time.time()
-    
+    start_time = time.monotonic_ns()
+
     try:
         # Process the request - ALWAYS call the handler first
         response = await handler(request)
         
         # Track page views for GET requests to static content
-        if (request.method == 'GET' and 
-            not request.path.startswith('/ask') and
-            not request.path.startswith('/api/') and
-            not request.path.startswith('/health')):
+        if request.method == 'GET' and not request.path.startswith(_SKIP_PREFIXES):
             
             # Get current sitetag if available
             sitetag = request.query.get('sitetag')
@@ -250,6 +447,6 @@ async def analytics_middleware(request: web.Request, handler):
         raise
     finally:
         # Log request timing
-        duration_ms = int((time.time() - start_time) * 1000)
+        duration_ms = (time.monotonic_ns() - start_time) // 1_000_000
         if duration_ms > 1000:  # Log slow requests
             logger.warning(f"Slow request: {request.path} took {duration_ms}ms")
\ No newline at end of file
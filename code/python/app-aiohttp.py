@@ -11,21 +11,31 @@ Backwards compatibility is not guaranteed at this time.
 import asyncio
 import os
 import sys
-from dotenv import load_dotenv
-from qdrant_client import QdrantClient
+import orjson
 from aiohttp import web
-from qdrant_store import search as qsearch
 
-QDRANT_URL = os.environ.get("QDRANT_URL")
-QDRANT_API_KEY = os.environ.get("QDRANT_API_KEY")
 
-qdrant = None
-if QDRANT_URL:
-    qdrant = QdrantClient(url=QDRANT_URL, api_key=QDRANT_API_KEY, timeout=30.0)
+async def _init_qdrant(app):
+    """Create the shared Qdrant client once the event loop is running.
+
+    Imported lazily so cold start doesn't pay for qdrant_client (or block
+    on DNS/TCP) in workers that never serve /v1/search.
+    """
+    qdrant_url = os.environ.get("QDRANT_URL")
+    if not qdrant_url:
+        app['qdrant'] = None
+        return
+    from qdrant_client import AsyncQdrantClient
+    app['qdrant'] = AsyncQdrantClient(
+        url=qdrant_url,
+        api_key=os.environ.get("QDRANT_API_KEY"),
+        timeout=30.0
+    )
 
 
 async def main():
     # Load environment variables from .env file (useful locally)
+    from dotenv import load_dotenv
     load_dotenv()
 
     # Suppress verbose HTTP client logging from OpenAI SDK
@@ -68,23 +78,26 @@ async def main():
 
     @routes.get("/v1/search")
     async def http_search(request: web.Request):
+        from qdrant_store import async_search as qsearch
         q = request.query.get("q", "").strip()
         sitetag = request.query.get("sitetag")
         if not q:
             return web.json_response({"error": "missing q"}, status=400)
-        hits = qsearch(q, top_k=8, sitetag=sitetag)
-        out = []
-        for h in hits:
-            out.append({
-                "id": str(h.id),
-                "score": h.score,
-                "payload": h.payload,
-            })
-        return web.json_response({"results": out})
+        hits = await qsearch(q, top_k=8, sitetag=sitetag,
+                             client=request.app.get('qdrant'))
+        out = [{
+            "id": str(h.id),
+            "score": h.score,
+            "payload": h.payload,
+        } for h in hits]
+        # orjson is ~2-3x faster than the stdlib json used by json_response
+        return web.Response(body=orjson.dumps({"results": out}),
+                            content_type="application/json")
 
     # Get the app instance and add routes
     app = await server.create_app()
     app.add_routes(routes)
+    app.on_startup.append(_init_qdrant)
 
     # Prefer explicit host/port; fall back to env-only if older signature
     try:
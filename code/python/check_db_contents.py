@@ -69,6 +69,12 @@ async def check_database_contents():
 
 
 if __name__ == "__main__":
+    # uvloop gives a sizeable asyncio throughput boost when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     print("🚀 Checking vector database contents...")
     success = asyncio.run(check_database_contents())
     
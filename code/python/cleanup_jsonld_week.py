@@ -11,6 +11,7 @@ Delete ALL JSON-LD files from the previous week (Sun..Sat).
 
 from __future__ import annotations
 import os
+import shutil
 from pathlib import Path
 from datetime import date, timedelta
 from dotenv import load_dotenv
@@ -35,16 +36,43 @@ def main():
     print(f"Week to delete: {week[0]} .. {week[-1]}")
 
     deleted = 0
+
+    # Fast path: when the archive is organized into per-day subfolders,
+    # remove those directories wholesale without walking the rest of the tree
+    remaining = []
     for day in week:
-        suffix = f"_{day.isoformat()}.jsonld"
-        # walk all subfolders too
-        for p in jsonld_dir.rglob(f"*{suffix}"):
+        iso = day.isoformat()
+        day_dir = jsonld_dir / iso
+        if day_dir.is_dir():
             try:
-                p.unlink()
-                deleted += 1
-                print(f"  ✂︎ {p}")
+                count = sum(len(files) for _, _, files in os.walk(day_dir))
+                shutil.rmtree(day_dir)
+                deleted += count
+                print(f"  ✂︎ {day_dir} ({count} file(s))")
+                continue
             except Exception as e:
-                print(f"  ! Could not delete {p}: {e}")
+                print(f"  ! Could not delete {day_dir}: {e}")
+        remaining.append(iso)
+
+    if not remaining:
+        print(f"Done. Deleted {deleted} file(s).")
+        return
+
+    # Flat layout fallback: one walk over the tree, matching the remaining
+    # day suffixes at once (str.endswith accepts a tuple), instead of one
+    # recursive glob per day
+    suffixes = tuple(f"_{iso}.jsonld" for iso in remaining)
+
+    for root, _, files in os.walk(jsonld_dir):
+        for fn in files:
+            if fn.endswith(suffixes):
+                p = os.path.join(root, fn)
+                try:
+                    os.unlink(p)
+                    deleted += 1
+                    print(f"  ✂︎ {p}")
+                except Exception as e:
+                    print(f"  ! Could not delete {p}: {e}")
 
     print(f"Done. Deleted {deleted} file(s).")
 
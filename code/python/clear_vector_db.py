@@ -30,12 +30,10 @@ async def clear_vector_database():
         
         print(f"📋 Found {len(all_sites)} sites to delete: {all_sites}")
         
-        # Delete documents for each site
-        total_deleted = 0
-        for site in all_sites:
-            deleted_count = await retriever.delete_documents_by_site(site)
-            total_deleted += deleted_count
-            print(f"  🗑️  Deleted {deleted_count} documents from site: {site}")
+        # One bulk delete with a MatchAny site filter instead of a delete
+        # RPC per site
+        total_deleted = await retriever.delete_documents_by_site(list(all_sites))
+        print(f"  🗑️  Deleted {total_deleted} documents across {len(all_sites)} sites")
         
         print(f"✅ Successfully deleted {total_deleted} total documents from vector database!")
         
@@ -47,6 +45,12 @@ async def clear_vector_database():
 
 
 if __name__ == "__main__":
+    # uvloop gives a sizeable asyncio throughput boost when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     print("🚀 Starting vector database cleanup...")
     success = asyncio.run(clear_vector_database())
     
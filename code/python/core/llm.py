@@ -15,6 +15,7 @@ import asyncio
 import threading
 import subprocess
 import sys
+import importlib.util
 
 
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
@@ -71,17 +72,15 @@ def _ensure_package_installed(llm_type: str):
         if package_name in _installed_packages:
             continue
             
-        try:
-            # Try to import the package first
-            if package_name == "google-cloud-aiplatform":
-                __import__("vertexai")
-            elif package_name == "huggingface_hub":
-                __import__("huggingface_hub")
-            else:
-                __import__(package_name)
+        # find_spec probes availability without executing the module body,
+        # so provider SDKs aren't imported just for this check
+        import_name = {
+            "google-cloud-aiplatform": "vertexai",
+        }.get(package_name, package_name)
+        if importlib.util.find_spec(import_name) is not None:
             _installed_packages.add(package_name)
             logger.debug(f"Package {package_name} is already installed")
-        except ImportError:
+        else:
             # Package not installed, install it
             logger.info(f"Installing {package} for {llm_type} provider...")
             try:
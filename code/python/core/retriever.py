@@ -11,6 +11,7 @@ import time
 import asyncio
 import subprocess
 import sys
+import importlib.util
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional, Union, Tuple, Type
 import json
@@ -102,23 +103,24 @@ def _ensure_package_installed(db_type: str):
         if package_name in _installed_packages:
             continue
             
+        # find_spec doesn't execute the target module's body, so heavy
+        # clients (Pydantic models, grpc stubs) aren't imported just to
+        # check they exist. For dotted names it does import the parent
+        # packages, and raises when those are missing entirely - which is
+        # exactly the "needs installing" case, not an error.
+        import_name = {
+            "azure-core": "azure.core",
+            "azure-search-documents": "azure.search.documents",
+            "qdrant-client": "qdrant_client",
+        }.get(package_name, package_name)
         try:
-            # Try to import the package first
-            if package_name == "azure-core":
-                __import__("azure.core")
-            elif package_name == "azure-search-documents":
-                __import__("azure.search.documents")
-            elif package_name == "qdrant-client":
-                __import__("qdrant_client")
-            elif package_name == "elasticsearch":
-                __import__("elasticsearch")
-            elif package_name == "psycopg":
-                __import__("psycopg")
-            else:
-                __import__(package_name)
+            spec = importlib.util.find_spec(import_name)
+        except ModuleNotFoundError:
+            spec = None
+        if spec is not None:
             _installed_packages.add(package_name)
             logger.debug(f"Package {package_name} is already installed")
-        except ImportError:
+        else:
             # Package not installed, install it
             logger.info(f"Installing {package} for {db_type} backend...")
             try:
@@ -13,11 +13,11 @@ import json
 import re
 import logging
 import asyncio
+import httpx
 from typing import Dict, Any, List, Optional
 
 from openai import AsyncOpenAI
 from core.config import CONFIG
-import threading
 from misc.logger.logging_config_helper import get_configured_logger
 from misc.logger.logger import LogLevel
 
@@ -27,6 +27,32 @@ from llm_providers.llm_provider import LLMProvider
 from misc.logger.logging_config_helper import get_configured_logger, LogLevel
 logger = get_configured_logger("llm")
 
+# Compiled once: fence stripping and JSON decoding are per-completion hot paths
+_FENCE_RE = re.compile(r"```(?:json)?\s*")
+_JSON_DECODER = json.JSONDecoder()
+
+# HTTP/2 multiplexes concurrent completions over one connection, but httpx
+# only enables it when the optional h2 package is installed
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+
+# Schemas are long-lived constants reused across completions; cache their
+# serialized form by identity (the entry holds the schema, so ids stay valid)
+_SCHEMA_CACHE: Dict[int, tuple] = {}
+
+
+def _schema_json(schema: Dict[str, Any]) -> str:
+    key = id(schema)
+    hit = _SCHEMA_CACHE.get(key)
+    if hit is None or hit[0] is not schema:
+        hit = (schema, json.dumps(schema))
+        _SCHEMA_CACHE[key] = hit
+    return hit[1]
+
 
 class ConfigurationError(RuntimeError):
     """
@@ -39,7 +65,6 @@ class ConfigurationError(RuntimeError):
 class OpenAIProvider(LLMProvider):
     """Implementation of LLMProvider for OpenAI API."""
     
-    _client_lock = threading.Lock()
     _client = None
 
     @classmethod
@@ -57,10 +82,20 @@ class OpenAIProvider(LLMProvider):
         """
         Configure and return an asynchronous OpenAI client.
         """
-        with cls._client_lock:  # Thread-safe client initialization
-            if cls._client is None:
-                api_key = cls.get_api_key()
-                cls._client = AsyncOpenAI(api_key=api_key)
+        # Single event-loop process: a plain None-check is enough, and it
+        # avoids taking a lock on every completion
+        if cls._client is None:
+            api_key = cls.get_api_key()
+            # Raise httpx's default pool limits (20 keepalive / 100 total):
+            # under concurrent completions the keepalive cap forces fresh
+            # TCP/TLS handshakes
+            http_client = httpx.AsyncClient(
+                http2=_HTTP2,
+                limits=httpx.Limits(max_keepalive_connections=100,
+                                    max_connections=200),
+                timeout=60.0,
+            )
+            cls._client = AsyncOpenAI(api_key=api_key, http_client=http_client)
         return cls._client
 
     @classmethod
@@ -73,7 +108,7 @@ class OpenAIProvider(LLMProvider):
                 "role": "system",
                 "content": (
                     f"Provide a valid JSON response matching this schema: "
-                    f"{json.dumps(schema)}"
+                    f"{_schema_json(schema)}"
                 )
             },
             {"role": "user", "content": prompt}
@@ -87,20 +122,29 @@ class OpenAIProvider(LLMProvider):
         if not content:
             logger.warning("Received empty content from OpenAI")
             return {}
-            
-        # Remove markdown code block indicators if present
-        cleaned = re.sub(r"```(?:json)?\s*", "", content).strip()
-        
-        # Find the JSON object within the response
+
+        # Happy path: decode in place starting at the first '{' - no fence
+        # stripping, no rfind, no sliced copy of the body
+        start_idx = content.find('{')
+        if start_idx != -1:
+            try:
+                result, _ = _JSON_DECODER.raw_decode(content, start_idx)
+                if isinstance(result, dict):
+                    return result
+            except json.JSONDecodeError:
+                pass
+
+        # Fallback: strip markdown code fences and take the outermost braces
+        cleaned = _FENCE_RE.sub("", content).strip()
         start_idx = cleaned.find('{')
         end_idx = cleaned.rfind('}') + 1
-        
+
         if start_idx == -1 or end_idx == 0:
             logger.error("No valid JSON object found in response: %r", cleaned)
             return {}
-            
+
         json_str = cleaned[start_idx:end_idx]
-        
+
         try:
             result = json.loads(json_str)
             return result
@@ -1,9 +1,13 @@
 # NLWeb/code/python/load_today_to_qdrant.py - Updated with incremental loading
-import os, argparse, json, uuid, sys
+import asyncio
+import os, argparse, uuid, sys
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
+import orjson
 from pathlib import Path
 from typing import Iterable
-from openai import OpenAI
-from qdrant_client import QdrantClient
+from openai import AsyncOpenAI
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
 
 # Environment variable validation
@@ -14,37 +18,91 @@ def validate_env():
         print(f"❌ Missing required environment variables: {', '.join(missing)}", file=sys.stderr)
         sys.exit(1)
 
-JSONLD_DIR = os.getenv("JSONLD_DIR", "../../data/jsonld")
+# Default anchored to this file so in-process callers (tasks.py) don't
+# depend on the working directory
+_NLWEB_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+JSONLD_DIR = os.getenv("JSONLD_DIR", os.path.join(_NLWEB_ROOT, "data", "jsonld"))
 MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 COLL = os.getenv("QDRANT_COLLECTION", "askbucky")
 
+# Embedding batch limits: the API takes a list input, so batching amortizes
+# one HTTPS round-trip over many texts. The char cap keeps a batch safely
+# under the per-request token limits.
+EMBED_BATCH_SIZE = 64
+EMBED_BATCH_CHARS = 100_000
+
+# How many embedding requests may be in flight at once
+EMBED_CONCURRENCY = 16
+
+# Points per upsert batch. Qdrant throughput peaks around small batches
+# once upserts are pipelined, so default low and leave it tunable per
+# deployment without a code change.
+UPSERT_BATCH_SIZE = int(os.getenv("QDRANT_UPSERT_BATCH", "32"))
+
+# Once collection + index init has succeeded, this sentinel lets later runs
+# skip the whole init block (delete it to force re-init, e.g. after
+# pointing at a fresh cluster)
+INIT_SENTINEL = Path(os.path.expanduser("~/.cache/askbucky/qdrant_init_v1"))
+
+# On-disk embedding cache: daily menus repeat heavily week to week, so
+# most texts have been embedded before. Keyed by model + content digest;
+# each entry is the raw vector as a JSON float list. Delete the directory
+# to invalidate (e.g. after switching embedding models mid-name).
+EMB_CACHE_DIR = INIT_SENTINEL.parent / "emb_cache" / MODEL
+
+# Namespace for deterministic point IDs: the same (sitetag, doc_id) always
+# maps to the same point, so re-runs overwrite instead of duplicating
+POINT_NS = uuid.UUID("6f1d7c52-8a34-4b9e-9c3d-2e5a1b8f4d07")
+
 def iter_jsonld_files(root: Path, date_str: str) -> Iterable[Path]:
-    for p in root.rglob("*.json"):
-        if date_str in str(p):
-            yield p
-    for p in root.rglob("*.jsonld"):
-        if date_str in str(p):
-            yield p
+    # Single os.walk instead of two rglob passes over the whole tree;
+    # match on the filename alone, which is where the date lives
+    for dirpath, _, fnames in os.walk(root):
+        for n in fnames:
+            if date_str in n and n.endswith((".json", ".jsonld")):
+                yield Path(dirpath) / n
+
+_TEXT_KEYS = frozenset({"text", "content", "description", "name", "title"})
 
 def extract_text(obj) -> str:
-    if isinstance(obj, dict):
-        parts = []
-        for k, v in obj.items():
-            if k in ("text", "content", "description", "name", "title"):
-                if isinstance(v, str): parts.append(v)
-            parts.append(extract_text(v))
-        return "\n".join([p for p in parts if p])
-    if isinstance(obj, list):
-        return "\n".join(extract_text(x) for x in obj)
-    if isinstance(obj, str):
-        return obj
-    return ""
-
-def ensure_indexes(client: QdrantClient, coll: str):
-    # Idempotent: avoid "index required" errors on filters
-    for field in ("sitetag", "doc_id"):
+    # Iterative walk with an explicit stack: no recursion frames, no
+    # per-level list + join, and one final join over all the pieces.
+    # (The old recursion also collected keyed strings twice - once in the
+    # key branch and again when recursing into the value.)
+    parts = []
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, str):
+            if o:
+                parts.append(o)
+        elif isinstance(o, dict):
+            pending = []
+            for k, v in o.items():
+                if k in _TEXT_KEYS and isinstance(v, str):
+                    # hot path: known text key, skip the stack round-trip
+                    if v:
+                        parts.append(v)
+                else:
+                    pending.append(v)
+            stack.extend(reversed(pending))
+        elif isinstance(o, list):
+            stack.extend(reversed(o))
+    return "\n".join(parts)
+
+async def ensure_indexes(client: AsyncQdrantClient, coll: str):
+    # Idempotent: avoid "index required" errors on filters. One schema
+    # probe up front, then create only what's actually missing instead of
+    # firing create RPCs that fail with "already exists" on every run.
+    try:
+        schema = (await client.get_collection(coll)).payload_schema or {}
+    except Exception:
+        schema = {}
+    for field in ("sitetag", "site", "doc_id"):
+        if field in schema:
+            continue
         try:
-            client.create_payload_index(
+            await client.create_payload_index(
                 coll,
                 field_name=field,
                 field_schema=models.PayloadSchemaType.KEYWORD
@@ -52,85 +110,148 @@ def ensure_indexes(client: QdrantClient, coll: str):
         except Exception:
             pass  # already exists or server ignores
 
-def file_doc_id(path: str) -> str:
-    return Path(path).stem  # e.g., 'gordon-avenue-market_lunch_1849_2025-08-23'
-
-def exists_today_for_doc(client: QdrantClient, coll: str, sitetag: str, doc_id: str) -> bool:
-    resp = client.count(
-        collection_name=coll,
-        count_filter=models.Filter(must=[
-            models.FieldCondition(key="sitetag", match=models.MatchValue(value=sitetag)),
-            models.FieldCondition(key="doc_id",  match=models.MatchValue(value=doc_id)),
-        ]),
-        exact=True
-    )
-    return getattr(resp, "count", 0) > 0
+def _read_entry(fp: Path):
+    """Read, parse and extract text for one file (runs on a worker thread)"""
+    try:
+        data = orjson.loads(fp.read_bytes())
+    except Exception:
+        return None
+    text = extract_text(data).strip()
+    if not text:
+        return None
+
+    # Extract name from the data
+    item_name = ""
+    if isinstance(data, dict):
+        if "name" in data:
+            item_name = data["name"]
+        elif "title" in data:
+            item_name = data["title"]
+        elif "description" in data:
+            item_name = data["description"][:100]  # Truncate long descriptions
+
+    return data, text, item_name
+
+def batch_entries(items):
+    """Group (digest, text) pairs into embedding batches bounded by count and total chars"""
+    batch, chars = [], 0
+    for item in items:
+        batch.append(item)
+        chars += len(item[1])
+        if len(batch) >= EMBED_BATCH_SIZE or chars >= EMBED_BATCH_CHARS:
+            yield batch
+            batch, chars = [], 0
+    if batch:
+        yield batch
+
+async def embed_texts(oai: AsyncOpenAI, texts: list[str],
+                      sem: asyncio.Semaphore) -> list[list[float]]:
+    """Embed a batch of texts with one API call, preserving input order"""
+    async with sem:
+        response = await oai.embeddings.create(model=MODEL, input=texts)
+    return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
+async def existing_doc_ids(client: AsyncQdrantClient, coll: str, sitetag: str) -> set[str]:
+    """Fetch all doc_ids already loaded for a sitetag in one scroll pass"""
+    doc_ids: set[str] = set()
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=coll,
+            scroll_filter=models.Filter(must=[
+                models.FieldCondition(key="sitetag", match=models.MatchValue(value=sitetag)),
+            ]),
+            with_payload=["doc_id"],
+            with_vectors=False,
+            limit=1024,
+            offset=offset,
+        )
+        doc_ids.update(p.payload["doc_id"] for p in points
+                       if p.payload and "doc_id" in p.payload)
+        if offset is None:
+            break
+    return doc_ids
 
-def main():
+async def main(argv=None):
     # Validate environment variables first
     validate_env()
-    
+
     ap = argparse.ArgumentParser()
     ap.add_argument("--today", required=True)
     ap.add_argument("--yesterday", required=True)
-    args = ap.parse_args()
+    ap.add_argument("--force", action="store_true",
+                    help="re-process files even if unchanged since the last load")
+    args = ap.parse_args(argv)
 
     q_url = os.environ["QDRANT_URL"]
     q_key = os.getenv("QDRANT_API_KEY")
-    oai = OpenAI()
-    qd = QdrantClient(url=q_url, api_key=q_key, timeout=30.0)
+    oai = AsyncOpenAI()
+    # gRPC skips JSON-encoding the 1536-float vectors on every upsert
+    qd = AsyncQdrantClient(url=q_url, api_key=q_key, prefer_grpc=True, timeout=30.0)
     coll = os.getenv("QDRANT_COLLECTION", "askbucky")
-    ensure_indexes(qd, coll)
-    
-    # ensure collection exists (size must match your embeddings)
-    emb_dim = int(os.getenv("EMBEDDING_DIM", "1536"))
-    try:
-        qd.get_collection(COLL)
-    except Exception:
-        qd.create_collection(
-            collection_name=COLL,
-            vectors_config=models.VectorParams(size=emb_dim, distance=models.Distance.COSINE),
-            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1),  # Force immediate indexing
-        )
-    # ensure filterable fields
-    for field, schema in (("sitetag", models.PayloadSchemaType.KEYWORD),
-                          ("site",    models.PayloadSchemaType.KEYWORD)):
+
+    # Collection/index init only needs to succeed once; a local sentinel
+    # skips all of these round-trips on cron-driven daily runs
+    if not INIT_SENTINEL.exists():
+        # ensure collection exists (size must match your embeddings)
+        emb_dim = int(os.getenv("EMBEDDING_DIM", "1536"))
         try:
-            qd.create_payload_index(
+            await qd.get_collection(COLL)
+        except Exception:
+            await qd.create_collection(
                 collection_name=COLL,
-                field_name=field,
-                field_schema=schema,
+                # float16 storage + int8 scalar quantization: ~4x less RAM and
+                # bandwidth per vector with negligible recall loss for
+                # text-embedding-3-small (vectors are still sent as float32)
+                vectors_config=models.VectorParams(
+                    size=emb_dim,
+                    distance=models.Distance.COSINE,
+                    datatype=models.Datatype.FLOAT16,
+                ),
+                quantization_config=models.ScalarQuantization(
+                    scalar=models.ScalarQuantizationConfig(
+                        type=models.ScalarType.INT8,
+                        quantile=0.99,
+                        always_ram=True,
+                    )
+                ),
+                optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1),  # Force immediate indexing
             )
-        except Exception:
-            pass  # already exists / non-fatal
-    
-    # Force indexing for existing collections
-    try:
-        qd.update_collection(
-            collection_name=COLL,
-            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1)
-        )
-        print(f"Updated collection {COLL} to force immediate indexing")
-    except Exception as e:
-        print(f"Warning: Could not update collection indexing threshold: {e}")
+        # ensure filterable fields (skips ones that already exist)
+        await ensure_indexes(qd, COLL)
 
-    # 1) delete only yesterday's points (keep today's for incremental updates)
+        # Force indexing for existing collections
+        try:
+            await qd.update_collection(
+                collection_name=COLL,
+                optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1)
+            )
+            print(f"Updated collection {COLL} to force immediate indexing")
+        except Exception as e:
+            print(f"Warning: Could not update collection indexing threshold: {e}")
+
+        try:
+            INIT_SENTINEL.parent.mkdir(parents=True, exist_ok=True)
+            INIT_SENTINEL.touch()
+        except Exception as e:
+            print(f"warn: could not write init sentinel: {e}")
+
+    # 1) delete only yesterday's points (keep today's for incremental
+    # updates). The result isn't needed until the end of the run, so fire
+    # it as a background task and let embedding work overlap the delete.
     yesterday_tag = f"menus_{args.yesterday}"
-    try:
-        qd.delete(
-            collection_name=COLL,
-            points_selector=models.FilterSelector(
-                filter=models.Filter(must=[
-                    models.FieldCondition(
-                        key="sitetag",
-                        match=models.MatchValue(value=yesterday_tag)
-                    )
-                ])
-            ),
-        )
-        print(f"deleted sitetag={yesterday_tag}")
-    except Exception as e:
-        print(f"warn: delete {yesterday_tag} failed: {e}")
+    delete_task = asyncio.create_task(qd.delete(
+        collection_name=COLL,
+        points_selector=models.FilterSelector(
+            filter=models.Filter(must=[
+                models.FieldCondition(
+                    key="sitetag",
+                    match=models.MatchValue(value=yesterday_tag)
+                )
+            ])
+        ),
+        wait=False,
+    ))
 
     # 2) upsert today’s points
     t_tag = f"menus_{args.today}"
@@ -144,54 +265,144 @@ def main():
     
     print(f"Found {len(files)} JSON-LD files for {args.today}")
 
-    pts = []
+    # One bulk scroll for today's doc_ids instead of a count RPC per file
+    try:
+        existing_ids = await existing_doc_ids(qd, coll, t_tag)
+    except Exception as e:
+        print(f"warn: could not fetch existing doc_ids: {e}")
+        existing_ids = set()
+
+    # Files untouched since the last successful load are skipped outright:
+    # no read, no parse, no hash
+    watermark_path = INIT_SENTINEL.parent / f"{t_tag}.mtime"
+    try:
+        watermark = float(watermark_path.read_text())
+    except (OSError, ValueError):
+        watermark = 0.0
+    max_mtime_seen = watermark
+
+    # Cheap per-file pass first: stat-based skip checks only, no reads
+    to_read = []  # (fp, doc_id, site, meal)
     for fp in files:
-        # Check if this file already exists for today
-        doc_id = file_doc_id(str(fp))
-        if exists_today_for_doc(qd, coll, t_tag, doc_id):
+        # One stem split serves doc_id, site and meal
+        # e.g. 'gordon-avenue-market_lunch_1849_2025-08-23'
+        doc_id = fp.stem
+        parts = doc_id.split("_", 2)
+        site = parts[0] if parts else None                   # e.g., 'rhetas-market'
+        meal = parts[1] if len(parts) > 1 else None          # e.g., 'lunch'
+
+        # Skip files already embedded for today and unchanged since the
+        # last run (a changed file re-embeds; uuid5 IDs make that an
+        # overwrite, not a duplicate)
+        mtime = fp.stat().st_mtime
+        if mtime > max_mtime_seen:
+            max_mtime_seen = mtime
+        if not args.force and mtime <= watermark and doc_id in existing_ids:
             print(f"skip_existing: {doc_id} already embedded for {t_tag}")
             continue
-            
-        try:
-            data = json.loads(fp.read_text())
-        except Exception:
-            continue
-        text = extract_text(data).strip()
-        if not text:
-            continue
-        
-        # Generate embedding with error handling
-        try:
-            response = oai.embeddings.create(model=MODEL, input=text)
-            emb = response.data[0].embedding
-            if not emb:
-                print(f"Warning: Empty embedding for {fp.name}")
+
+        to_read.append((fp, doc_id, site, meal))
+
+    # Read + parse + extract on a thread pool so disk I/O on one file
+    # overlaps parsing of another (and the delete task keeps running)
+    entries = []  # (fp, data, text, doc_id, site, meal, item_name)
+    if to_read:
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4)) as ex:
+            results = await asyncio.gather(
+                *(loop.run_in_executor(ex, _read_entry, fp) for fp, _, _, _ in to_read))
+        for (fp, doc_id, site, meal), result in zip(to_read, results):
+            if result is None:
                 continue
-        except Exception as e:
-            print(f"Error generating embedding for {fp.name}: {e}")
+            data, text, item_name = result
+            entries.append((fp, data, text, doc_id, site, meal, item_name))
+
+    # Menus repeat identical item text across sites/meals, so embed each
+    # distinct text once and share the vector between duplicates
+    digests = [blake2b(entry[2].encode(), digest_size=16).digest()
+               for entry in entries]
+    unique_texts: dict[bytes, str] = {}
+    for digest, entry in zip(digests, entries):
+        unique_texts.setdefault(digest, entry[2])
+    if len(unique_texts) < len(entries):
+        print(f"dedup: {len(entries)} texts -> {len(unique_texts)} unique embeddings")
+
+    # Check the on-disk cache before spending API calls: only texts never
+    # embedded under this model go out over the network
+    vectors: dict[bytes, list[float]] = {}
+    to_embed: dict[bytes, str] = unique_texts
+    if not args.force:
+        to_embed = {}
+        for digest, text in unique_texts.items():
+            try:
+                vectors[digest] = orjson.loads(
+                    (EMB_CACHE_DIR / f"{digest.hex()}.json").read_bytes())
+            except (OSError, ValueError):
+                to_embed[digest] = text
+        if vectors:
+            print(f"emb_cache: {len(vectors)} hits, {len(to_embed)} to embed")
+
+    # Embed batches concurrently: the work is network-bound, so overlapping
+    # requests (bounded by the semaphore) cuts wall time by roughly the
+    # concurrency factor until rate limits bite
+    sem = asyncio.Semaphore(EMBED_CONCURRENCY)
+    # Sort by length so each batch is length-homogeneous: the server pads
+    # a batch to its longest input, so mixing short and long texts wastes
+    # tokens. Order doesn't matter downstream - vectors are keyed by digest.
+    batches = list(batch_entries(
+        sorted(to_embed.items(), key=lambda kv: len(kv[1]))))
+    results = await asyncio.gather(
+        *(embed_texts(oai, [text for _, text in batch], sem) for batch in batches),
+        return_exceptions=True
+    )
+
+    try:
+        EMB_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_ok = True
+    except OSError as e:
+        print(f"warn: could not create embedding cache dir: {e}")
+        cache_ok = False
+    for batch, embs in zip(batches, results):
+        if isinstance(embs, BaseException):
+            print(f"Error generating embeddings for batch of {len(batch)}: {embs}")
             continue
-        
-        # Parse site and meal from filename
-        name = fp.name.rsplit(".", 1)[0]
-        parts = name.split("_")
-        site = parts[0] if len(parts) > 0 else None          # e.g., 'rhetas-market'
-        meal = parts[1] if len(parts) > 1 else None          # e.g., 'lunch'
-        
-        # Extract name from the data
-        item_name = ""
-        if isinstance(data, dict):
-            if "name" in data:
-                item_name = data["name"]
-            elif "title" in data:
-                item_name = data["title"]
-            elif "description" in data:
-                item_name = data["description"][:100]  # Truncate long descriptions
-        
+        for (digest, _), emb in zip(batch, embs):
+            if emb:
+                vectors[digest] = emb
+                if cache_ok:
+                    try:
+                        (EMB_CACHE_DIR / f"{digest.hex()}.json").write_bytes(
+                            orjson.dumps(emb))
+                    except OSError:
+                        cache_ok = False
+
+    # Pause HNSW indexing while the bulk load runs: index inserts dominate
+    # server-side ingest cost, and building the index once at the end is
+    # much cheaper than maintaining it point by point
+    try:
+        await qd.update_collection(
+            collection_name=COLL,
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=0)
+        )
+    except Exception as e:
+        print(f"warn: could not pause indexing for bulk load: {e}")
+
+    # Parallel id/vector/payload lists upserted as models.Batch: one
+    # columnar validation per batch instead of a Pydantic PointStruct
+    # instantiation (which walks all 1536 floats) per point
+    ids, vecs, payloads = [], [], []
+    upsert_tasks = []
+    for (fp, data, text, doc_id, site, meal, item_name), digest in zip(entries, digests):
+        emb = vectors.get(digest)
+        if not emb:
+            print(f"Warning: Empty embedding for {fp.name}")
+            continue
+
         payload = {
             "sitetag": t_tag,                # menus_YYYY-MM-DD (today)
             "site": site,                    # Site name
             "name": item_name,               # Item name for search results
-            "schema_json": json.dumps(data), # Full schema data for search results
+            "schema_json": orjson.dumps(data).decode(), # Full schema data for search results
             "url": f"file://{fp}",           # URL for search results
             "meal": meal,                    # optional but handy
             "date": args.today,              # explicit date of this load
@@ -199,20 +410,57 @@ def main():
             "kind": "nutrislice",
             "doc_id": doc_id,                # File identifier for future skips
         }
-        
-        pts.append(models.PointStruct(
-            id=str(uuid.uuid4()),
-            vector=emb,
-            payload=payload
-        ))
 
-        if len(pts) >= 128:
-            qd.upsert(collection_name=COLL, points=pts); pts = []
+        ids.append(str(uuid.uuid5(POINT_NS, f"{t_tag}:{doc_id}")))
+        vecs.append(emb)
+        payloads.append(payload)
 
-    if pts:
-        qd.upsert(collection_name=COLL, points=pts)
+        if len(ids) >= UPSERT_BATCH_SIZE:
+            # Fire the batch without awaiting so upserts overlap with the
+            # rest of the point building; gathered below
+            upsert_tasks.append(asyncio.create_task(qd.upsert(
+                collection_name=COLL,
+                points=models.Batch(ids=ids, vectors=vecs, payloads=payloads),
+                wait=False)))
+            ids, vecs, payloads = [], [], []
+
+    if upsert_tasks:
+        await asyncio.gather(*upsert_tasks)
+    if ids:
+        await qd.upsert(
+            collection_name=COLL,
+            points=models.Batch(ids=ids, vectors=vecs, payloads=payloads),
+            wait=True)
+
+    # Restore immediate indexing (threshold=1 matches the init-time setting)
+    # now that the bulk load is done
+    try:
+        await qd.update_collection(
+            collection_name=COLL,
+            optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1)
+        )
+    except Exception as e:
+        print(f"warn: could not restore indexing threshold: {e}")
+
+    try:
+        await delete_task
+        print(f"deleted sitetag={yesterday_tag}")
+    except Exception as e:
+        print(f"warn: delete {yesterday_tag} failed: {e}")
+
+    try:
+        watermark_path.parent.mkdir(parents=True, exist_ok=True)
+        watermark_path.write_text(str(max_mtime_seen))
+    except Exception as e:
+        print(f"warn: could not write watermark: {e}")
 
     print(f"loaded {t_tag} from {len(files)} files")
 
 if __name__ == "__main__":
-    main()
+    # uvloop gives a sizeable asyncio throughput boost when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    asyncio.run(main())
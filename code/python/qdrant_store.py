@@ -5,13 +5,163 @@ Qdrant search functionality for AskBucky
 
 import os
 from typing import List, Optional
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models
-from core.embedding import get_embedding
+from core.embedding import get_embedding, batch_get_embeddings
 from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("qdrant_store")
 
+# Clients are created once and reused: each construction rebuilds the
+# connection pool and pays a fresh TLS handshake, which dominates latency
+# under sustained query load
+_async_client: Optional[AsyncQdrantClient] = None
+_sync_client: Optional[QdrantClient] = None
+
+
+def _get_async_client() -> Optional[AsyncQdrantClient]:
+    """Return the shared AsyncQdrantClient, or None if QDRANT_URL is unset"""
+    global _async_client
+    if _async_client is None:
+        qdrant_url = os.environ.get("QDRANT_URL")
+        if not qdrant_url:
+            logger.error("QDRANT_URL not found in environment")
+            return None
+        # gRPC carries query vectors as packed floats instead of ~30KB of
+        # JSON-encoded ASCII, and multiplexes requests over one connection
+        _async_client = AsyncQdrantClient(
+            url=qdrant_url,
+            api_key=os.environ.get("QDRANT_API_KEY"),
+            prefer_grpc=True,
+            timeout=30.0
+        )
+    return _async_client
+
+
+def _get_sync_client() -> Optional[QdrantClient]:
+    """Return the shared QdrantClient, or None if QDRANT_URL is unset"""
+    global _sync_client
+    if _sync_client is None:
+        qdrant_url = os.environ.get("QDRANT_URL")
+        if not qdrant_url:
+            logger.error("QDRANT_URL not found in environment")
+            return None
+        _sync_client = QdrantClient(
+            url=qdrant_url,
+            api_key=os.environ.get("QDRANT_API_KEY"),
+            prefer_grpc=True,
+            timeout=30.0
+        )
+    return _sync_client
+
+
+def _build_filter(sitetag: Optional[str]) -> Optional[models.Filter]:
+    """Build the site filter for a search, or None when unfiltered"""
+    if not sitetag:
+        return None
+    return models.Filter(
+        must=[
+            models.FieldCondition(
+                key="site",
+                match=models.MatchValue(value=sitetag)
+            )
+        ]
+    )
+
+
+async def async_search(query: str, top_k: int = 8, sitetag: Optional[str] = None,
+                       client: Optional[AsyncQdrantClient] = None) -> List[models.ScoredPoint]:
+    """
+    Search for documents in Qdrant without blocking the event loop
+
+    Args:
+        query: Search query string
+        top_k: Number of results to return
+        sitetag: Optional site tag to filter results
+        client: Optional shared AsyncQdrantClient; one is created from the
+            environment when not provided
+
+    Returns:
+        List of ScoredPoint objects with search results
+    """
+    try:
+        if client is None:
+            client = _get_async_client()
+            if client is None:
+                return []
+
+        # Get embedding for the query
+        embedding = await get_embedding(query)
+
+        # Perform search
+        search_result = await client.search(
+            collection_name="nlweb_documents",  # Default collection name
+            query_vector=embedding,
+            limit=top_k,
+            query_filter=_build_filter(sitetag),
+            with_payload=True,
+            with_vectors=False
+        )
+
+        logger.info(f"Search returned {len(search_result)} results for query: {query}")
+        return search_result
+
+    except Exception as e:
+        logger.error(f"Error in Qdrant search: {e}")
+        return []
+
+
+async def search_many(queries: List[str], top_k: int = 8, sitetag: Optional[str] = None,
+                      client: Optional[AsyncQdrantClient] = None) -> List[List[models.ScoredPoint]]:
+    """
+    Run several searches in one Qdrant round-trip
+
+    Queries are embedded with a single batched embedding call and executed
+    server-side via search_batch, so N related queries (e.g. menu +
+    allergen + nutrition facets) cost one embedding request and one
+    Qdrant request instead of N of each.
+
+    Args:
+        queries: Search query strings
+        top_k: Number of results to return per query
+        sitetag: Optional site tag to filter results
+        client: Optional shared AsyncQdrantClient
+
+    Returns:
+        One list of ScoredPoint per query, in input order
+    """
+    if not queries:
+        return []
+    try:
+        if client is None:
+            client = _get_async_client()
+            if client is None:
+                return [[] for _ in queries]
+
+        embeddings = await batch_get_embeddings(queries)
+        flt = _build_filter(sitetag)
+
+        results = await client.search_batch(
+            collection_name="nlweb_documents",  # Default collection name
+            requests=[
+                models.SearchRequest(
+                    vector=emb,
+                    filter=flt,
+                    limit=top_k,
+                    with_payload=True
+                )
+                for emb in embeddings
+            ]
+        )
+
+        logger.info(f"Batch search returned results for {len(queries)} queries")
+        return results
+
+    except Exception as e:
+        logger.error(f"Error in Qdrant batch search: {e}")
+        return [[] for _ in queries]
+
+
 def search(query: str, top_k: int = 8, sitetag: Optional[str] = None) -> List[models.ScoredPoint]:
     """
     Search for documents in Qdrant
@@ -25,38 +175,21 @@ def search(query: str, top_k: int = 8, sitetag: Optional[str] = None) -> List[mo
         List of ScoredPoint objects with search results
     """
     try:
-        # Get Qdrant connection details from environment
-        qdrant_url = os.environ.get("QDRANT_URL")
-        qdrant_api_key = os.environ.get("QDRANT_API_KEY")
-        
-        if not qdrant_url:
-            logger.error("QDRANT_URL not found in environment")
+        client = _get_sync_client()
+        if client is None:
             return []
-        
-        # Create client
-        client = QdrantClient(url=qdrant_url, api_key=qdrant_api_key, timeout=30.0)
-        
-        # Get embedding for the query
-        embedding = get_embedding(query)
-        
-        # Build search filter
-        search_filter = None
-        if sitetag:
-            search_filter = models.Filter(
-                must=[
-                    models.FieldCondition(
-                        key="site",
-                        match=models.MatchValue(value=sitetag)
-                    )
-                ]
-            )
-        
+
+
+        # Get embedding for the query (async API; run it on a throwaway loop)
+        import asyncio
+        embedding = asyncio.run(get_embedding(query))
+
         # Perform search
         search_result = client.search(
             collection_name="nlweb_documents",  # Default collection name
             query_vector=embedding,
             limit=top_k,
-            query_filter=search_filter,
+            query_filter=_build_filter(sitetag),
             with_payload=True,
             with_vectors=False
         )
@@ -348,13 +348,14 @@ class QdrantVectorClient:
             return False
     
     async def delete_documents_by_site(
-        self, site: str, collection_name: Optional[str] = None
+        self, site: Union[str, List[str]], collection_name: Optional[str] = None
     ) -> int:
         """
-        Delete all documents from a collection that match a specific site value.
+        Delete all documents from a collection that match a site value.
 
         Args:
-            site: The site value to filter by
+            site: The site value to filter by, or a list of sites to delete
+                in a single filtered call
             collection_name: Optional collection name (defaults to configured name)
 
         Returns:
@@ -369,10 +370,12 @@ class QdrantVectorClient:
             )
             return 0
 
+        if isinstance(site, list):
+            match = models.MatchAny(any=site)
+        else:
+            match = models.MatchValue(value=site)
         filter_condition = models.Filter(
-            must=[
-                models.FieldCondition(key="site", match=models.MatchValue(value=site))
-            ]
+            must=[models.FieldCondition(key="site", match=match)]
         )
         count = (
             await client.count(
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-import subprocess
+import asyncio
 import sys
 import os
 import time
@@ -7,6 +7,12 @@ import json
 from pathlib import Path
 import analytics
 
+from data_loading.db_load import loadJsonToDB
+
+# How many files may load concurrently. The work is I/O-bound on embedding
+# and upsert calls, so overlapping files hides most of the latency.
+LOAD_CONCURRENCY = 8
+
 class RobustMenuLoader:
     def __init__(self, date="2025-08-05"):
         self.date = date
@@ -23,66 +29,64 @@ class RobustMenuLoader:
             files.append(str(file_path))
         return sorted(files)
     
-    def load_single_file(self, file_path, retries=3):
-        """Load a single file with retry logic"""
+    async def load_single_file(self, file_path, retries=3):
+        """Load a single file in-process with retry logic"""
         for attempt in range(retries):
             try:
                 print(f"  Loading {os.path.basename(file_path)} (attempt {attempt + 1}/{retries})...")
-                
-                # Use --force-recompute to ensure fresh embeddings
-                result = subprocess.run([
-                    'python', '-m', 'data_loading.db_load', 
-                    file_path, self.site_name, '--force-recompute'
-                ], capture_output=True, text=True, timeout=300)  # 5 minute timeout
-                
-                if result.returncode == 0:
-                    print(f"  ✓ Successfully loaded {os.path.basename(file_path)}")
-                    return True
-                else:
-                    print(f"  ✗ Failed to load {os.path.basename(file_path)}: {result.stderr}")
-                    if attempt < retries - 1:
-                        print(f"  Retrying in 5 seconds...")
-                        time.sleep(5)
-                    
-            except subprocess.TimeoutExpired:
+
+                # In-process call: no interpreter startup per file, and the
+                # Qdrant/OpenAI clients are opened once for the whole run.
+                # force_recompute ensures fresh embeddings.
+                await asyncio.wait_for(
+                    loadJsonToDB(file_path, self.site_name, force_recompute=True),
+                    timeout=300  # 5 minute timeout
+                )
+                print(f"  ✓ Successfully loaded {os.path.basename(file_path)}")
+                return True
+
+            except asyncio.TimeoutError:
                 print(f"  ⏰ Timeout loading {os.path.basename(file_path)}")
                 if attempt < retries - 1:
                     print(f"  Retrying in 10 seconds...")
-                    time.sleep(10)
+                    await asyncio.sleep(10)
             except Exception as e:
                 print(f"  💥 Error loading {os.path.basename(file_path)}: {e}")
                 if attempt < retries - 1:
                     print(f"  Retrying in 5 seconds...")
-                    time.sleep(5)
-        
+                    await asyncio.sleep(5)
+
         return False
-    
-    def load_all_files(self):
-        """Load all today's files with progress tracking"""
+
+    async def load_all_files(self):
+        """Load all today's files concurrently with progress tracking"""
         start_time = time.time()
         files = self.find_todays_files()
         self.total_files = len(files)
-        
+
         print(f"🎯 Found {self.total_files} files for {self.date}")
         print(f"📁 Site name: {self.site_name}")
-        print(f"🚀 Starting batch load...\n")
-        
-        for i, file_path in enumerate(files, 1):
-            print(f"[{i}/{self.total_files}] Processing {os.path.basename(file_path)}")
-            
-            if self.load_single_file(file_path):
+        print(f"🚀 Starting batch load ({LOAD_CONCURRENCY} files at a time)...\n")
+
+        sem = asyncio.Semaphore(LOAD_CONCURRENCY)
+
+        async def load_bounded(file_path):
+            async with sem:
+                return file_path, await self.load_single_file(file_path)
+
+        tasks = [asyncio.create_task(load_bounded(fp)) for fp in files]
+        for i, task in enumerate(asyncio.as_completed(tasks), 1):
+            file_path, ok = await task
+            if ok:
                 self.successful_files.append(file_path)
             else:
                 self.failed_files.append(file_path)
-            
+
             # Progress update
             success_rate = (len(self.successful_files) / i) * 100
             print(f"📊 Progress: {i}/{self.total_files} ({success_rate:.1f}% success rate)")
             print()
-            
-            # Small delay to avoid overwhelming the system
-            time.sleep(1)
-        
+
         # Log job completion
         duration_ms = int((time.time() - start_time) * 1000)
         records_processed = len(self.successful_files)
@@ -168,7 +172,7 @@ def main():
             loader.failed_files = []
     
     try:
-        loader.load_all_files()
+        asyncio.run(loader.load_all_files())
         loader.generate_report()
         loader.save_state()
         
@@ -5,10 +5,15 @@
 Qdrant storage provider for conversation history.
 """
 
+import asyncio
 import os
+import time
 import uuid
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import blake2b
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
 
 from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
@@ -19,7 +24,94 @@ from misc.logger.logging_config_helper import get_configured_logger
 
 logger = get_configured_logger("qdrant_storage")
 
+# Coalescing writer: buffered points are flushed once per batch or after a
+# short wait, so concurrent add_conversation calls share one upsert
+# round-trip instead of paying one each
+WRITE_BATCH_SIZE = 64
+WRITE_BATCH_WAIT = 0.05  # seconds
+
+# How many upsert requests may be in flight at once; a small number keeps
+# the pipeline full without overwhelming the server
+UPSERT_INFLIGHT = int(os.getenv("QDRANT_INFLIGHT", "4"))
+
+# In-process LRU for conversation embeddings: retries and duplicate
+# submissions of identical text skip the embedding round-trip
+EMB_CACHE_SIZE = 1024
+
+# Embedding requests in flight at once. Together with the batch writer
+# this forms a two-stage pipeline: up to EMBED_INFLIGHT conversations sit
+# in the (dominant) embedding stage while finished ones coalesce into
+# batched upserts behind them.
+EMBED_INFLIGHT = int(os.getenv("EMBED_INFLIGHT", "16"))
+
+# Most recent turns kept per thread in the recent-conversations listing
+GROUP_SIZE = 10
+
+# Payload fields that must be filterable/orderable
+REQUIRED_INDEXES = (
+    ("user_id", models.PayloadSchemaType.KEYWORD),
+    ("thread_id", models.PayloadSchemaType.KEYWORD),
+    ("site", models.PayloadSchemaType.KEYWORD),
+    ("time_of_creation", models.PayloadSchemaType.DATETIME),
+)
+
+
+# One client per (url, api_key): every construction pays connection-pool
+# setup and a TLS handshake, so provider instances share it. gRPC keeps
+# vectors in packed protobuf and multiplexes requests over one connection.
+_shared_clients: Dict[Tuple[str, Optional[str]], AsyncQdrantClient] = {}
+
+
+def _get_shared_client(url: str, api_key: Optional[str]) -> AsyncQdrantClient:
+    """Return the process-wide AsyncQdrantClient for a remote Qdrant"""
+    key = (url, api_key)
+    client = _shared_clients.get(key)
+    if client is None:
+        client = AsyncQdrantClient(url=url, api_key=api_key, prefer_grpc=True)
+        _shared_clients[key] = client
+    return client
+
+
+# Filters are immutable once built, and the same (ids, site) shapes recur
+# on every poll of a thread or history view - memoize them so the hot
+# paths skip re-validating the nested Pydantic models each call
+@lru_cache(maxsize=512)
+def _thread_filter(thread_id: str, user_id: Optional[str]) -> models.Filter:
+    must = [
+        models.FieldCondition(
+            key="thread_id",
+            match=models.MatchValue(value=thread_id),
+        )
+    ]
+    if user_id:
+        must.append(
+            models.FieldCondition(
+                key="user_id",
+                match=models.MatchValue(value=user_id),
+            )
+        )
+    return models.Filter(must=must)
 
+
+@lru_cache(maxsize=512)
+def _recent_filter(user_id: str, site: str) -> models.Filter:
+    must = [
+        models.FieldCondition(
+            key="user_id",
+            match=models.MatchValue(value=user_id),
+        )
+    ]
+    if site != "all":
+        must.append(
+            models.FieldCondition(
+                key="site",
+                match=models.MatchValue(value=site),
+            )
+        )
+    return models.Filter(must=must)
+
+
+@lru_cache(maxsize=8)
 def _normalize_qdrant_url(u: Optional[str]) -> Optional[str]:
     if not u:
         return u
@@ -54,12 +146,17 @@ class QdrantStorageProvider(StorageProvider):
         self.path = path_cfg or os.getenv("QDRANT_LOCAL_PATH")
 
         self.client: Optional[AsyncQdrantClient] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._upsert_sem = asyncio.Semaphore(UPSERT_INFLIGHT)
+        self._emb_cache: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._embed_sem = asyncio.Semaphore(EMBED_INFLIGHT)
 
     async def initialize(self):
         try:
             if self.url:
                 logger.info(f"Connecting to Qdrant at {self.url}")
-                self.client = AsyncQdrantClient(url=self.url, api_key=self.api_key)
+                self.client = _get_shared_client(self.url, self.api_key)
             else:
                 logger.info(f"Using local Qdrant storage at {self.path}")
                 self.client = AsyncQdrantClient(path=self.path)
@@ -71,37 +168,31 @@ class QdrantStorageProvider(StorageProvider):
                 logger.info(f"Creating collection '{self.collection_name}'")
                 await self.client.create_collection(
                     collection_name=self.collection_name,
+                    # Full-precision vectors go to mmapped disk; searches
+                    # scan the int8-quantized copy kept in RAM (4x smaller
+                    # with negligible recall loss at 1536 dims)
                     vectors_config=models.VectorParams(
                         size=self.vector_size,
                         distance=models.Distance.COSINE,
+                        on_disk=True,
                     ),
-                )
-                try:
-                    import warnings
-                    with warnings.catch_warnings():
-                        warnings.filterwarnings("ignore", message="Payload indexes have no effect in the local Qdrant")
-                        await self.client.create_payload_index(
-                            collection_name=self.collection_name,
-                            field_name="user_id",
-                            field_schema=models.PayloadSchemaType.KEYWORD,
+                    quantization_config=models.ScalarQuantization(
+                        scalar=models.ScalarQuantizationConfig(
+                            type=models.ScalarType.INT8,
+                            quantile=0.99,
+                            always_ram=True,
                         )
-                        await self.client.create_payload_index(
-                            collection_name=self.collection_name,
-                            field_name="thread_id",
-                            field_schema=models.PayloadSchemaType.KEYWORD,
-                        )
-                        await self.client.create_payload_index(
-                            collection_name=self.collection_name,
-                            field_name="site",
-                            field_schema=models.PayloadSchemaType.KEYWORD,
-                        )
-                        await self.client.create_payload_index(
-                            collection_name=self.collection_name,
-                            field_name="time_of_creation",
-                            field_schema=models.PayloadSchemaType.DATETIME,
-                        )
-                except Exception:
-                    pass
+                    ),
+                    # user_prompt/response strings dominate payload size and
+                    # are only read for display, never filtered on; keep
+                    # them on disk and let the indexed fields stay hot
+                    on_disk_payload=True,
+                )
+
+            await self._ensure_payload_indexes()
+
+            self._write_queue = asyncio.Queue()
+            self._flusher = asyncio.create_task(self._flush_loop())
 
             logger.info("Qdrant storage provider initialized successfully")
 
@@ -109,6 +200,104 @@ class QdrantStorageProvider(StorageProvider):
             logger.error(f"Failed to initialize Qdrant storage: {e}")
             raise
 
+    async def _ensure_payload_indexes(self):
+        """Create only the payload indexes that don't already exist
+
+        One schema probe up front, then the missing creates fired in
+        parallel - a warm restart costs a single round-trip.
+        """
+        try:
+            info = await self.client.get_collection(self.collection_name)
+            existing = info.payload_schema or {}
+        except Exception:
+            existing = {}
+        to_create = [(field, schema) for field, schema in REQUIRED_INDEXES
+                     if field not in existing]
+        if not to_create:
+            return
+        try:
+            import warnings
+            with warnings.catch_warnings():
+                warnings.filterwarnings("ignore", message="Payload indexes have no effect in the local Qdrant")
+                await asyncio.gather(*[
+                    self.client.create_payload_index(
+                        collection_name=self.collection_name,
+                        field_name=field,
+                        field_schema=schema,
+                    )
+                    for field, schema in to_create
+                ])
+        except Exception:
+            pass
+
+    async def _flush_loop(self):
+        """Drain queued writes forever, upserting them in coalesced batches"""
+        while True:
+            batch: List[Tuple[models.PointStruct, asyncio.Future]] = [
+                await self._write_queue.get()
+            ]
+            # Gather whatever else arrives within the wait window, up to
+            # the batch cap
+            deadline = time.monotonic() + WRITE_BATCH_WAIT
+            while len(batch) < WRITE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(
+                        self._write_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # Fire the upsert as its own task, bounded by the semaphore, so
+            # the loop goes back to collecting the next batch while this
+            # one is on the wire
+            asyncio.create_task(self._upsert_batch(batch))
+
+    async def _upsert_batch(self, batch: List[Tuple[models.PointStruct, asyncio.Future]]):
+        """Upsert one collected batch and settle its callers' futures"""
+        try:
+            async with self._upsert_sem:
+                await self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=[point for point, _ in batch],
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _write_point(self, point: models.PointStruct) -> None:
+        """Submit a point to the batch writer and wait for its upsert"""
+        if self._write_queue is None:
+            # initialize() not run (e.g. direct use in tests) - write inline
+            await self.client.upsert(
+                collection_name=self.collection_name,
+                points=[point],
+            )
+            return
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((point, future))
+        await future
+
+    async def _get_embedding_cached(self, text: str) -> List[float]:
+        """Embed text, reusing a bounded LRU of recently embedded strings"""
+        key = blake2b(text.encode(), digest_size=16).digest()
+        cached = self._emb_cache.get(key)
+        if cached is not None:
+            self._emb_cache.move_to_end(key)
+            return cached
+        async with self._embed_sem:
+            embedding = await get_embedding(text)
+        self._emb_cache[key] = embedding
+        if len(self._emb_cache) > EMB_CACHE_SIZE:
+            self._emb_cache.popitem(last=False)
+        return embedding
+
     async def add_conversation(self, user_id: str, site: str, thread_id: Optional[str],
                                user_prompt: str, response: str) -> ConversationEntry:
         try:
@@ -118,7 +307,12 @@ class QdrantStorageProvider(StorageProvider):
 
             conversation_id = str(uuid.uuid4())
             conversation_text = f"User: {user_prompt}\nAssistant: {response}"
-            embedding = await get_embedding(conversation_text)
+            embedding = await self._get_embedding_cached(conversation_text)
+
+            # One tz-aware timestamp, formatted once, shared between the
+            # entry and the payload (utcnow() is deprecated and naive)
+            now = datetime.now(timezone.utc)
+            now_iso = now.isoformat()
 
             entry = ConversationEntry(
                 user_id=user_id,
@@ -126,13 +320,16 @@ class QdrantStorageProvider(StorageProvider):
                 thread_id=thread_id,
                 user_prompt=user_prompt,
                 response=response,
-                time_of_creation=datetime.utcnow(),
+                time_of_creation=now,
                 conversation_id=conversation_id,
                 embedding=embedding,
             )
 
+            # The point ID is the conversation_id itself: one UUID per
+            # write, and deletes/lookups can hit the ID index directly
+            # instead of filter-scanning the payload
             point = models.PointStruct(
-                id=str(uuid.uuid4()),
+                id=conversation_id,
                 vector=entry.embedding,
                 payload={
                     "conversation_id": entry.conversation_id,
@@ -141,14 +338,11 @@ class QdrantStorageProvider(StorageProvider):
                     "thread_id": entry.thread_id,
                     "user_prompt": entry.user_prompt,
                     "response": entry.response,
-                    "time_of_creation": entry.time_of_creation.isoformat(),
+                    "time_of_creation": now_iso,
                 },
             )
 
-            await self.client.upsert(
-                collection_name=self.collection_name,
-                points=[point],
-            )
+            await self._write_point(point)
 
             logger.debug(f"Stored conversation {entry.conversation_id} in thread {entry.thread_id}")
             return entry
@@ -157,32 +351,49 @@ class QdrantStorageProvider(StorageProvider):
             logger.error(f"Failed to add conversation: {e}")
             raise
 
-    async def get_conversation_thread(self, thread_id: str, user_id: Optional[str] = None) -> List[ConversationEntry]:
+    async def get_conversation_thread(self, thread_id: str, user_id: Optional[str] = None,
+                                      max_turns: Optional[int] = None) -> List[ConversationEntry]:
         try:
-            must = [
-                models.FieldCondition(
-                    key="thread_id",
-                    match=models.MatchValue(value=thread_id),
+            scroll_filter = _thread_filter(thread_id, user_id)
+
+            if max_turns is not None:
+                # Tail fetch: newest max_turns from the DATETIME index,
+                # flipped back into chronological order - exactly N points
+                # over the wire
+                points, _ = await self.client.scroll(
+                    collection_name=self.collection_name,
+                    scroll_filter=scroll_filter,
+                    limit=max_turns,
+                    order_by=models.OrderBy(key="time_of_creation", direction="desc"),
+                    with_payload=True,
+                    with_vectors=False,
                 )
-            ]
-            if user_id:
-                must.append(
-                    models.FieldCondition(
-                        key="user_id",
-                        match=models.MatchValue(value=user_id),
+                points.reverse()
+            else:
+                # Full thread: paginate instead of hoping it fits a fixed
+                # cap. Qdrant doesn't return next_page_offset with order_by
+                # set, so page unordered and sort by the raw ISO string
+                # (lexicographic order is chronological for UTC ISO-8601).
+                points = []
+                offset = None
+                while True:
+                    page, offset = await self.client.scroll(
+                        collection_name=self.collection_name,
+                        scroll_filter=scroll_filter,
+                        limit=256,
+                        offset=offset,
+                        with_payload=True,
+                        # Vectors are write-only for thread display: 6KB
+                        # per point of dead weight on the wire
+                        with_vectors=False,
                     )
-                )
-
-            results = await self.client.scroll(
-                collection_name=self.collection_name,
-                scroll_filter=models.Filter(must=must),
-                limit=1000,
-                with_payload=True,
-                with_vectors=True,
-            )
+                    points.extend(page)
+                    if offset is None:
+                        break
+                points.sort(key=lambda p: p.payload["time_of_creation"])
 
             conversations: List[ConversationEntry] = []
-            for point in results[0]:
+            for point in points:
                 payload = point.payload
                 conversations.append(
                     ConversationEntry(
@@ -193,40 +404,75 @@ class QdrantStorageProvider(StorageProvider):
                         user_prompt=payload["user_prompt"],
                         response=payload["response"],
                         time_of_creation=datetime.fromisoformat(payload["time_of_creation"]),
-                        embedding=point.vector,
+                        embedding=None,
                     )
                 )
 
-            conversations.sort(key=lambda x: x.time_of_creation)
             return conversations
 
         except Exception as e:
             logger.error(f"Failed to get conversation thread: {e}")
             return []
 
-    async def get_recent_conversations(self, user_id: str, site: str, limit: int = 50) -> List[Dict[str, Any]]:
+    async def get_conversations_by_ids(self, conversation_ids: List[str]) -> List[ConversationEntry]:
+        """
+        Fetch conversations directly by their IDs.
+
+        Point IDs are conversation_ids, so this is a straight ID-index
+        lookup - no filter scan. Returns entries in chronological order;
+        unknown IDs are silently skipped.
+        """
+        if not conversation_ids:
+            return []
         try:
-            must = [
-                models.FieldCondition(
-                    key="user_id",
-                    match=models.MatchValue(value=user_id),
+            records = await self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=conversation_ids,
+                with_payload=True,
+                with_vectors=False,
+            )
+            records.sort(key=lambda r: r.payload["time_of_creation"])
+
+            return [
+                ConversationEntry(
+                    conversation_id=record.payload["conversation_id"],
+                    user_id=record.payload["user_id"],
+                    site=record.payload["site"],
+                    thread_id=record.payload["thread_id"],
+                    user_prompt=record.payload["user_prompt"],
+                    response=record.payload["response"],
+                    time_of_creation=datetime.fromisoformat(record.payload["time_of_creation"]),
+                    embedding=None,
                 )
+                for record in records
             ]
-            if site != "all":
-                must.append(
-                    models.FieldCondition(
-                        key="site",
-                        match=models.MatchValue(value=site),
-                    )
-                )
 
-            filter_condition = models.Filter(must=must)
+        except Exception as e:
+            logger.error(f"Failed to get conversations by ids: {e}")
+            return []
+
+    async def get_recent_conversations(self, user_id: str, site: str, limit: int = 50) -> List[Dict[str, Any]]:
+        try:
+            filter_condition = _recent_filter(user_id, site)
 
+            # limit counts threads, but the scroll counts turns: size one
+            # ordered fetch for limit threads at up to GROUP_SIZE turns
+            # each, and cap the grouping below so a single long thread
+            # can't crowd out the rest
             results = await self.client.scroll(
                 collection_name=self.collection_name,
                 scroll_filter=filter_condition,
-                limit=limit,
-                with_payload=True,
+                limit=limit * GROUP_SIZE,
+                # Newest-first from the server: with limit semantics this
+                # returns the most recent turns, not an arbitrary sample
+                order_by=models.OrderBy(key="time_of_creation", direction="desc"),
+                # Project just the fields the thread list renders; user_id
+                # is already known and doesn't need to ride along on every
+                # point
+                with_payload=models.PayloadSelectorInclude(include=[
+                    "conversation_id", "site", "thread_id",
+                    "user_prompt", "response", "time_of_creation",
+                ]),
                 with_vectors=False,
             )
 
@@ -234,13 +480,20 @@ class QdrantStorageProvider(StorageProvider):
             for point in results[0]:
                 payload = point.payload
                 thread_id = payload["thread_id"]
-                if thread_id not in threads_dict:
-                    threads_dict[thread_id] = {
+                thread = threads_dict.get(thread_id)
+                if thread is None:
+                    if len(threads_dict) >= limit:
+                        # Enough threads already; anything new here is
+                        # older than all of them
+                        continue
+                    thread = threads_dict[thread_id] = {
                         "id": thread_id,
                         "site": payload["site"],
                         "conversations": [],
                     }
-                threads_dict[thread_id]["conversations"].append(
+                if len(thread["conversations"]) >= GROUP_SIZE:
+                    continue
+                thread["conversations"].append(
                     {
                         "id": payload["conversation_id"],
                         "user_prompt": payload["user_prompt"],
@@ -249,16 +502,13 @@ class QdrantStorageProvider(StorageProvider):
                     }
                 )
 
+            # Points arrived newest-first, so threads_dict insertion order
+            # is already most-recent-thread-first; each thread's turns just
+            # need reversing into chronological order
             for thread in threads_dict.values():
-                thread["conversations"].sort(key=lambda x: x["time"])
+                thread["conversations"].reverse()
 
-            threads_list = list(threads_dict.values())
-            threads_list.sort(
-                key=lambda t: t["conversations"][-1]["time"] if t["conversations"] else "",
-                reverse=True,
-            )
-
-            return threads_list
+            return list(threads_dict.values())
 
         except Exception as e:
             logger.error(f"Failed to get recent conversations: {e}")
@@ -266,6 +516,27 @@ class QdrantStorageProvider(StorageProvider):
 
     async def delete_conversation(self, conversation_id: str, user_id: Optional[str] = None) -> bool:
         try:
+            # Fast path: point IDs are conversation_ids, so ownership check
+            # and delete both hit the ID index directly
+            records = await self.client.retrieve(
+                collection_name=self.collection_name,
+                ids=[conversation_id],
+                with_payload=["user_id"],
+                with_vectors=False,
+            )
+            if records:
+                if user_id and records[0].payload.get("user_id") != user_id:
+                    logger.debug(f"Refusing to delete conversation {conversation_id}: user mismatch")
+                    return False
+                await self.client.delete(
+                    collection_name=self.collection_name,
+                    points_selector=models.PointIdsList(points=[conversation_id]),
+                )
+                logger.debug(f"Deleted conversation {conversation_id}")
+                return True
+
+            # Legacy points (written before IDs were unified) still need the
+            # filter-scan path
             must = [
                 models.FieldCondition(
                     key="conversation_id",
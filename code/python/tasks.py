@@ -1,24 +1,36 @@
 # NLWeb/code/python/tasks.py
-import os, sys, subprocess, datetime
+import asyncio, os, sys, datetime
 try:
     from zoneinfo import ZoneInfo
 except ImportError:
     from backports.zoneinfo import ZoneInfo  # py3.8 fallback if needed
 
-ROOT = os.path.dirname(__file__)
+ROOT = os.path.dirname(os.path.abspath(__file__))
 PYSCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(ROOT)), "pyscripts")
 
-def run(cmd: list[str], cwd: str = None) -> None:
-    print(f"→ running: {' '.join(cmd)}", flush=True)
-    working_dir = cwd if cwd else ROOT
-    subprocess.run(cmd, check=True, cwd=working_dir, env=os.environ.copy())
+# The stages used to run as one `python <script>.py` subprocess each, which
+# paid interpreter startup plus the heavy openai/qdrant imports per stage.
+# They now import once and run in-process.
+sys.path.insert(0, PYSCRIPTS_DIR)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def run_stage(name, fn):
+    print(f"→ running: {name}", flush=True)
+    in_root = os.getcwd()
+    # cleanup_jsonld_week resolves its default dir against the cwd the old
+    # subprocess ran in; keep that behavior for in-process calls
+    os.chdir(ROOT)
+    try:
+        return fn()
+    finally:
+        os.chdir(in_root)
 
 def weekly():
-    # Run scripts from pyscripts directory
-    run(["python", "fetch_menu.py"], cwd=PYSCRIPTS_DIR)
-    run(["python", "nutrislice_to_jsonld.py"], cwd=PYSCRIPTS_DIR)
-    # Run cleanup script from current directory
-    run(["python", "cleanup_jsonld_week.py"])
+    import fetch_menu, nutrislice_to_jsonld, cleanup_jsonld_week
+    run_stage("fetch_menu", lambda: asyncio.run(fetch_menu.main()))
+    run_stage("nutrislice_to_jsonld", nutrislice_to_jsonld.main)
+    run_stage("cleanup_jsonld_week", cleanup_jsonld_week.main)
 
 def daily():
     tz = os.getenv("LOCAL_TZ", "America/Chicago")
@@ -40,16 +52,26 @@ def daily():
 
     print("✅ All required environment variables are set", flush=True)
 
+    # Imported after the env check: fetch_menu validates its env at import
+    import fetch_menu, nutrislice_to_jsonld, load_today_to_qdrant
+
     # 1) Make sure JSON-LD for today exists in this container
-    run(["python", "fetch_menu.py"], cwd=PYSCRIPTS_DIR)
-    run(["python", "nutrislice_to_jsonld.py"], cwd=PYSCRIPTS_DIR)
+    run_stage("fetch_menu", lambda: asyncio.run(fetch_menu.main()))
+    run_stage("nutrislice_to_jsonld", nutrislice_to_jsonld.main)
 
     # 2) Load to Qdrant (and delete yesterday)
     os.environ["SITETAG_TODAY"] = f"menus_{today.isoformat()}"
     os.environ["SITETAG_YESTERDAY"] = f"menus_{yesterday.isoformat()}"
-    run(["python", "load_today_to_qdrant.py", "--today", today.isoformat(), "--yesterday", yesterday.isoformat()])
+    run_stage("load_today_to_qdrant", lambda: asyncio.run(load_today_to_qdrant.main(
+        ["--today", today.isoformat(), "--yesterday", yesterday.isoformat()])))
 
 if __name__ == "__main__":
+    # uvloop gives a sizeable asyncio throughput boost when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     if len(sys.argv) < 2:
         print("usage: python tasks.py [weekly|daily]", file=sys.stderr)
         sys.exit(2)
@@ -31,14 +31,18 @@ async def test_sites():
         for site in sites:
             print(f"   - {site}")
             
-        # Test a search query
-        print(f"\n🔍 Testing search for 'pizza':")
-        results = await retriever.search("pizza", top_k=3)
-        
-        print(f"   Found {len(results)} results")
-        for i, result in enumerate(results):
-            print(f"   {i+1}. Score: {result.score:.3f}, Site: {result.payload.get('site', 'N/A')}")
-            print(f"      Title: {result.payload.get('title', 'N/A')}")
+        # Probe with a handful of queries; they are independent round trips,
+        # so fan them out together instead of paying the RTT per query
+        queries = ["pizza", "salad", "burger", "pasta"]
+        print(f"\n🔍 Testing search for: {', '.join(queries)}")
+        all_results = await asyncio.gather(
+            *[retriever.search(q, top_k=3) for q in queries])
+
+        for query, results in zip(queries, all_results):
+            print(f"\n   '{query}': {len(results)} results")
+            for i, result in enumerate(results):
+                print(f"   {i+1}. Score: {result.score:.3f}, Site: {result.payload.get('site', 'N/A')}")
+                print(f"      Title: {result.payload.get('title', 'N/A')}")
             
     except Exception as e:
         print(f"❌ Error testing sites: {e}")
@@ -1,9 +1,21 @@
 import os
+from functools import cache
 from pathlib import Path
 
+def _normalize_url(u):
+    # Default the REST port when the URL doesn't carry one
+    if u and (u.startswith("http://") or u.startswith("https://")):
+        host = u.split("://", 1)[1]
+        if ":" not in host:
+            return u.rstrip("/") + ":6333"
+    return u
+
+@cache
 def resolve_qdrant_cfg():
+    # Environment doesn't change mid-process: resolve the env probing and
+    # URL normalization once and reuse the result on every construction
     # Prefer canonical names, fall back to legacy aliases
-    url = os.getenv("QDRANT_URL") or os.getenv("QDRANT_CLOUD_URL")
+    url = _normalize_url(os.getenv("QDRANT_URL") or os.getenv("QDRANT_CLOUD_URL"))
     api = os.getenv("QDRANT_API_KEY") or os.getenv("QDRANT_CLOUD_API_KEY")
     coll = (os.getenv("QDRANT_COLLECTION")
             or os.getenv("QDRANT_CLOUD_COLLECTION")
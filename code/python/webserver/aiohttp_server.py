@@ -215,4 +215,10 @@ async def main():
 
 
 if __name__ == "__main__":
+    # uvloop gives a sizeable asyncio throughput boost when available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     asyncio.run(main())
\ No newline at end of file
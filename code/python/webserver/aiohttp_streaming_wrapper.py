@@ -8,8 +8,9 @@ This provides compatibility between the existing handlers and aiohttp's streamin
 
 import time
 import asyncio
-import json
 import logging
+
+import orjson
 from typing import Dict, Any, Optional
 from aiohttp import web
 
@@ -62,6 +63,35 @@ class AioHttpStreamingWrapper:
         except Exception:
             self.connection_alive = False
     
+    async def write_frame(self, frame: bytes, end_response: bool = False):
+        """Write a pre-encoded SSE frame, skipping per-message serialization.
+
+        For frames that are identical on every connection (completion
+        terminator, keepalives) the bytes can be built once at module level
+        and reused.
+        """
+        if not self.connection_alive:
+            return
+
+        try:
+            if self.request.transport and self.request.transport.is_closing():
+                self.connection_alive = False
+                return
+
+            await self.response.write(frame)
+            await asyncio.sleep(0)
+
+            if end_response:
+                self.connection_alive = False
+                if self.heartbeat_task:
+                    self.heartbeat_task.cancel()
+
+        except Exception as e:
+            logger.debug(f"Error writing to stream: {e}")
+            self.connection_alive = False
+            if self.heartbeat_task:
+                self.heartbeat_task.cancel()
+
     async def write_stream(self, message: Dict[str, Any], end_response: bool = False):
         """
         Write a message to the SSE stream in a format compatible with existing handlers.
@@ -79,9 +109,9 @@ class AioHttpStreamingWrapper:
                 self.connection_alive = False
                 return
             
-            # Format as SSE
-            data = f"data: {json.dumps(message)}\n\n"
-            await self.response.write(data.encode())
+            # Format as SSE; orjson emits UTF-8 bytes directly, skipping the
+            # intermediate str and encode pass
+            await self.response.write(b"data: " + orjson.dumps(message) + b"\n\n")
             
             # Yield control
             await asyncio.sleep(0)
@@ -169,8 +199,7 @@ class AioHttpSendChunkWrapper:
             
             if isinstance(chunk, dict):
                 # Format as SSE data
-                message = f"data: {json.dumps(chunk)}\n\n"
-                await self.response.write(message.encode())
+                await self.response.write(b"data: " + orjson.dumps(chunk) + b"\n\n")
             elif isinstance(chunk, str):
                 await self.response.write(chunk.encode())
             elif isinstance(chunk, bytes):
@@ -194,8 +223,7 @@ class AioHttpSendChunkWrapper:
             return
             
         try:
-            data_message = f"data: {json.dumps(message)}\n\n"
-            await self.response.write(data_message.encode())
+            await self.response.write(b"data: " + orjson.dumps(message) + b"\n\n")
             
             if end_response:
                 self.closed = True
@@ -19,6 +19,9 @@ def setup_middleware(app):
     app.middlewares.append(logging_middleware)
     app.middlewares.append(error_middleware)
 
+    # Start the analytics event batcher once the event loop is running
+    app.on_startup.append(analytics.on_startup)
+
 
 __all__ = [
     'setup_middleware',
@@ -1,10 +1,16 @@
 """Core API routes for aiohttp server"""
 
 from aiohttp import web
+import asyncio
+import functools
+import gzip
+import hashlib
 import logging
-import json
 import time
 import os
+import socket
+import orjson
+from types import MappingProxyType
 from typing import Dict, Any
 from methods.whoHandler import WhoHandler
 from methods.generate_answer import GenerateAnswer
@@ -15,6 +21,89 @@ from core.utils.utils import get_param
 
 logger = logging.getLogger(__name__)
 
+# Values that turn the streaming flag off; frozenset lookup avoids building
+# a list per request on the hot path
+_FALSY = frozenset({"False", "false", "0"})
+
+# The generation model doesn't change mid-process; resolve it once for the
+# analytics call sites instead of hitting os.environ per request
+_GEN_MODEL = os.getenv("GEN_MODEL", "gpt-4o-mini")
+
+# The completion terminator is identical for every stream: encode it once and
+# write the same bytes object to each connection instead of re-serializing.
+_COMPLETE_FRAME = b'data: {"message_type": "complete"}\n\n'
+
+# SSE headers never vary per request; build the mapping once
+_SSE_HEADERS = MappingProxyType({
+    'Content-Type': 'text/event-stream',
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+    'X-Accel-Buffering': 'no'
+})
+
+
+def _json_response(data: Any, status: int = 200) -> web.Response:
+    """web.json_response with orjson doing the encoding.
+
+    Serialization is the dominant CPU cost for large result payloads, and
+    orjson encodes straight to UTF-8 bytes several times faster than the
+    stdlib encoder.
+    """
+    return web.Response(body=orjson.dumps(data), status=status,
+                        content_type='application/json')
+
+
+def maybe_compress(request: web.Request, response: web.Response, threshold: int = 1024) -> web.Response:
+    """Enable gzip on a JSON response when the client accepts it and the body is large.
+
+    Small bodies aren't worth the CPU, and SSE responses must never be
+    compressed (it breaks event framing), so this is only called on the
+    plain JSON branches.
+    """
+    if 'X-No-Compression' in request.headers:
+        return response
+    if 'gzip' not in request.headers.get('Accept-Encoding', ''):
+        return response
+    if response.body is not None and len(response.body) > threshold:
+        response.enable_compression(web.ContentCoding.gzip)
+    return response
+
+
+# /sites changes on a minutes-to-hours timescale but cost a vector-DB round
+# trip on every request; cache the serialized payload briefly and answer
+# If-None-Match with a 304.
+_SITES_TTL = 60.0
+_sites_cache = None  # (expires, etag, json_body, sse_frame)
+_sites_lock = asyncio.Lock()
+
+
+async def _get_sites_payload(query_params: Dict[str, Any]):
+    """Return (etag, json_body, sse_frame) for the sites list, cached for _SITES_TTL.
+
+    Requests that override the retrieval backend (dev-mode 'db' /
+    'retrieval_backend' params) bypass the cache so they always see their
+    own endpoint's sites.
+    """
+    global _sites_cache
+    cacheable = not (query_params.get('db') or query_params.get('retrieval_backend'))
+    if cacheable:
+        cached = _sites_cache
+        if cached and cached[0] > time.monotonic():
+            return cached[1:]
+    async with _sites_lock:
+        if cacheable:
+            cached = _sites_cache
+            if cached and cached[0] > time.monotonic():
+                return cached[1:]
+        retriever = get_vector_db_client(query_params=query_params)
+        sites = await retriever.get_sites()
+        body = orjson.dumps({"message-type": "sites", "sites": sites})
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        frame = b"data: " + body + b"\n\n"
+        if cacheable:
+            _sites_cache = (time.monotonic() + _SITES_TTL, etag, body, frame)
+        return etag, body, frame
+
 
 def setup_api_routes(app: web.Application):
     """Setup core API routes"""
@@ -35,18 +124,22 @@ async def ask_handler(request: web.Request) -> web.Response:
     # Track request start time for latency measurement
     start_time = time.time()
     
-    # Get query parameters
-    query_params = dict(request.query)
-    
+    # The MultiDict is read-only downstream; only materialize a real dict
+    # when a POST body has to be merged over the query string
+    query_params = request.query
+
     # For POST requests, merge body parameters
     if request.method == 'POST':
         try:
             if request.content_type == 'application/json':
-                body_data = await request.json()
-                query_params.update(body_data)
+                # Read the raw bytes once and decode with orjson rather than
+                # request.json(), which runs the stdlib parser over a decoded str
+                body = await request.read()
+                if body:
+                    query_params = {**request.query, **orjson.loads(body)}
             elif request.content_type == 'application/x-www-form-urlencoded':
                 body_data = await request.post()
-                query_params.update(dict(body_data))
+                query_params = {**request.query, **body_data}
         except Exception as e:
             logger.warning(f"Failed to parse POST body: {e}")
     
@@ -58,7 +151,7 @@ async def ask_handler(request: web.Request) -> web.Response:
     # Check if SSE streaming is requested
     is_sse = request.get('is_sse', False)
     streaming = get_param(query_params, "streaming", str, "True")
-    streaming = streaming not in ["False", "false", "0"]
+    streaming = streaming not in _FALSY
     
     if is_sse or streaming:
         return await handle_streaming_ask(request, query_params, start_time)
@@ -70,18 +163,22 @@ async def handle_streaming_ask(request: web.Request, query_params: Dict[str, Any
     """Handle streaming (SSE) ask requests"""
     
     # Create SSE response
-    response = web.StreamResponse(
-        status=200,
-        headers={
-            'Content-Type': 'text/event-stream',
-            'Cache-Control': 'no-cache',
-            'Connection': 'keep-alive',
-            'X-Accel-Buffering': 'no'
-        }
-    )
-    
+    response = web.StreamResponse(status=200, headers=_SSE_HEADERS)
+
     await response.prepare(request)
-    
+
+    # Long-lived streams want real backpressure and prompt small frames:
+    # zero the write buffer high-water mark so drain() only returns once the
+    # client keeps up, and push frames immediately instead of Nagle-batching.
+    # Best-effort - not every transport exposes these knobs.
+    try:
+        request.transport.set_write_buffer_limits(0)
+        sock = request.transport.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except Exception as e:
+        logger.debug(f"Could not tune SSE transport: {e}")
+
     # Log ask started event
     query = get_param(query_params, "query", str, "")
     site = get_param(query_params, "site", str, "all")
@@ -106,13 +203,13 @@ async def handle_streaming_ask(request: web.Request, query_params: Dict[str, Any
             await handler.runQuery()
         
         # Send completion message
-        await wrapper.write_stream({"message_type": "complete"})
+        await wrapper.write_frame(_COMPLETE_FRAME)
         
         # Log successful ask answered event
         latency_ms = int((time.time() - start_time) * 1000)
         # TEMPORARILY DISABLED: analytics.log_ask_answered(
         #     request, response, query, "success", 0, latency_ms, 
-        #     site, sitetag, os.getenv("GEN_MODEL", "gpt-4o-mini")
+        #     site, sitetag, _GEN_MODEL
         # )
         
     except Exception as e:
@@ -123,7 +220,7 @@ async def handle_streaming_ask(request: web.Request, query_params: Dict[str, Any
         latency_ms = int((time.time() - start_time) * 1000)
         # TEMPORARILY DISABLED: analytics.log_ask_answered(
         #     request, response, query, "error", 0, latency_ms,
-        #     site, sitetag, os.getenv("GEN_MODEL", "gpt-4o-mini"), 
+        #     site, sitetag, _GEN_MODEL, 
         #     error_message=str(e)
         # )
     finally:
@@ -141,7 +238,7 @@ async def handle_regular_ask(request: web.Request, query_params: Dict[str, Any],
     
     try:
         # Log ask started event
-        response = web.json_response({})  # Temporary response for analytics
+        response = _json_response({})  # Temporary response for analytics
         # TEMPORARILY DISABLED: analytics.log_ask_started(request, response, query, site, sitetag)
         
         # Determine which handler to use
@@ -171,15 +268,29 @@ async def handle_regular_ask(request: web.Request, query_params: Dict[str, Any],
                 if sources_count == 0:
                     status = "empty"
         
-        # Create final response
-        final_response = web.json_response(result)
-        
+        # Create final response. enable_compression() runs zlib on the event
+        # loop, which stalls every other request for multi-MB bodies, so
+        # large /ask payloads are compressed in a worker thread instead.
+        body = orjson.dumps(result)
+        if (len(body) > 1024
+                and 'gzip' in request.headers.get('Accept-Encoding', '')
+                and 'X-No-Compression' not in request.headers):
+            compressed = await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(gzip.compress, body, 6))
+            final_response = web.Response(
+                body=compressed,
+                content_type='application/json',
+                headers={'Content-Encoding': 'gzip', 'Vary': 'Accept-Encoding'}
+            )
+        else:
+            final_response = web.Response(body=body, content_type='application/json')
+
         # Log ask answered event
         # TEMPORARILY DISABLED: analytics.log_ask_answered(
         #     request, final_response, query, status, sources_count, latency_ms,
-        #     site, sitetag, os.getenv("GEN_MODEL", "gpt-4o-mini")
+        #     site, sitetag, _GEN_MODEL
         # )
-        
+
         return final_response
         
     except Exception as e:
@@ -189,7 +300,7 @@ async def handle_regular_ask(request: web.Request, query_params: Dict[str, Any],
         latency_ms = int((time.time() - start_time) * 1000)
         
         # Create error response
-        error_response = web.json_response({
+        error_response = _json_response({
             "message_type": "error",
             "error": str(e)
         }, status=500)
@@ -197,7 +308,7 @@ async def handle_regular_ask(request: web.Request, query_params: Dict[str, Any],
         # Log error event
         # TEMPORARILY DISABLED: analytics.log_ask_answered(
         #     request, error_response, query, "error", 0, latency_ms,
-        #     site, sitetag, os.getenv("GEN_MODEL", "gpt-4o-mini"),
+        #     site, sitetag, _GEN_MODEL,
         #     error_message=str(e)
         # )
         
@@ -208,18 +319,18 @@ async def who_handler(request: web.Request) -> web.Response:
     """Handle /who endpoint"""
     
     try:
-        # Get query parameters
-        query_params = dict(request.query)
-        
+        # Get query parameters (read-only; no need to copy the MultiDict)
+        query_params = request.query
+
         # Run the who handler
         handler = WhoHandler(query_params, None)
         result = await handler.runQuery()
-        
-        return web.json_response(result)
+
+        return maybe_compress(request, _json_response(result))
         
     except Exception as e:
         logger.error(f"Error in who handler: {e}", exc_info=True)
-        return web.json_response({
+        return _json_response({
             "message_type": "error",
             "error": str(e)
         }, status=500)
@@ -229,38 +340,20 @@ async def sites_handler(request: web.Request) -> web.Response:
     """Handle /sites endpoint to get available sites"""
     
     try:
-        # Get query parameters
-        query_params = dict(request.query)
-        
+        # Get query parameters (read-only; no need to copy the MultiDict)
+        query_params = request.query
+
         # Check if streaming is requested
         streaming = get_param(query_params, "streaming", str, "False")
-        streaming = streaming not in ["False", "false", "0"]
-        
-        # Create a retriever client
-        retriever = get_vector_db_client(query_params=query_params)
-        
-        # Get the list of sites
-        sites = await retriever.get_sites()
-        
-        # Prepare the response
-        response_data = {
-            "message-type": "sites",
-            "sites": sites
-        }
+        streaming = streaming not in _FALSY
         
+        etag, body, frame = await _get_sites_payload(query_params)
+
         if streaming or request.get('is_sse', False):
-            # Return as SSE
-            response = web.StreamResponse(
-                status=200,
-                headers={
-                    'Content-Type': 'text/event-stream',
-                    'Cache-Control': 'no-cache',
-                    'Connection': 'keep-alive',
-                    'X-Accel-Buffering': 'no'
-                }
-            )
+            # Return as SSE, reusing the pre-encoded frame
+            response = web.StreamResponse(status=200, headers=_SSE_HEADERS)
             await response.prepare(request)
-            await response.write(f"data: {json.dumps(response_data)}\n\n".encode())
+            await response.write(frame)
             
             # Log page view for sites endpoint
             sitetag = request.query.get('sitetag')
@@ -268,22 +361,25 @@ async def sites_handler(request: web.Request) -> web.Response:
             
             return response
         else:
-            # Return as JSON
-            response = web.json_response(response_data)
-            
+            # Return as JSON, honoring conditional requests
+            if request.headers.get('If-None-Match') == etag:
+                return web.Response(status=304, headers={'ETag': etag})
+            response = web.Response(body=body, content_type='application/json',
+                                    headers={'ETag': etag})
+
             # Log page view for sites endpoint
             sitetag = request.query.get('sitetag')
             # TEMPORARILY DISABLED: analytics.log_page_view(request, response, path="/sites", sitetag=sitetag)
-            
-            return response
-            
+
+            return maybe_compress(request, response)
+
     except Exception as e:
         logger.error(f"Error getting sites: {e}", exc_info=True)
         error_data = {
             "message-type": "error",
             "error": f"Failed to get sites: {str(e)}"
         }
-        error_response = web.json_response(error_data, status=500)
+        error_response = _json_response(error_data, status=500)
         
         # Log error
         # TEMPORARILY DISABLED: analytics.log_error(request, error_response, "api", str(e), site="all")
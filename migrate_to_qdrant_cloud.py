@@ -14,11 +14,26 @@ from qdrant_client.http import models
 # Add the code/python directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'code', 'python'))
 
+# How many upserts may be in flight while the next scroll runs. The loop is
+# network-bound in both directions, so overlapping the source reads with the
+# cloud writes roughly doubles throughput.
+UPSERT_WORKERS = 4
+QUEUE_DEPTH = 8
+
+
+def _to_point_structs(points) -> List[models.PointStruct]:
+    """Build target PointStructs (IDs as strings) for one scrolled batch."""
+    return [
+        models.PointStruct(id=str(p.id), vector=p.vector, payload=p.payload)
+        for p in points
+    ]
+
+
 async def migrate_collection(
     source_client: AsyncQdrantClient,
     target_client: AsyncQdrantClient,
     collection_name: str,
-    batch_size: int = 100
+    batch_size: int = 512
 ):
     """Migrate a collection from source to target Qdrant instance."""
     
@@ -53,47 +68,47 @@ async def migrate_collection(
             print(f"   ⚠️  Collection {collection_name} is empty, skipping")
             return
         
-        # Migrate points in batches
+        # Migrate points with the scroll and the upserts pipelined: a producer
+        # keeps reading the next page while consumers push previous pages to
+        # the cloud, so neither side sits idle waiting on the other's RTT.
+        queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_DEPTH)
         migrated_count = 0
-        offset = 0
-        
-        while True:
-            # Get batch from source
-            batch = await source_client.scroll(
-                collection_name=collection_name,
-                limit=batch_size,
-                offset=offset,
-                with_payload=True,
-                with_vectors=True
-            )
-            
-            points = batch[0]
-            if not points:
-                break
-            
-            # Prepare points for target (ensure IDs are strings)
-            target_points = []
-            for point in points:
-                target_points.append(models.PointStruct(
-                    id=str(point.id),
-                    vector=point.vector,
-                    payload=point.payload
-                ))
-            
-            # Insert batch into target
-            await target_client.upsert(
-                collection_name=collection_name,
-                points=target_points
-            )
-            
-            migrated_count += len(points)
-            offset += len(points)
-            
-            print(f"   📤 Migrated {migrated_count}/{source_count.count} points ({migrated_count/source_count.count*100:.1f}%)")
-            
-            if len(points) < batch_size:
-                break
-        
+
+        async def producer():
+            offset = None
+            while True:
+                points, offset = await source_client.scroll(
+                    collection_name=collection_name,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+                if points:
+                    await queue.put(points)
+                if offset is None or not points:
+                    break
+            for _ in range(UPSERT_WORKERS):
+                await queue.put(None)
+
+        async def consumer():
+            nonlocal migrated_count
+            while True:
+                points = await queue.get()
+                if points is None:
+                    return
+                # PointStruct construction is pure CPU (pydantic validation);
+                # keep it off the loop so scrolls/upserts stay responsive
+                target_points = await asyncio.to_thread(_to_point_structs, points)
+                await target_client.upsert(
+                    collection_name=collection_name,
+                    points=target_points
+                )
+                migrated_count += len(points)
+                print(f"   📤 Migrated {migrated_count}/{source_count.count} points ({migrated_count/source_count.count*100:.1f}%)")
+
+        await asyncio.gather(producer(), *(consumer() for _ in range(UPSERT_WORKERS)))
+
         # Verify migration
         target_count = await target_client.count(collection_name)
         print(f"   ✅ Migration complete! Target has {target_count.count} points")
@@ -163,19 +178,11 @@ async def migrate_to_qdrant_cloud():
         return False
 
 if __name__ == "__main__":
-    # Load environment variables from .env file if it exists
-    env_file = os.path.join(os.path.dirname(__file__), '.env')
-    if os.path.exists(env_file):
-        print("📄 Loading environment variables from .env file...")
-        with open(env_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    # Remove quotes if present
-                    value = value.strip('"\'')
-                    os.environ[key] = value
-    
+    # Load environment variables from .env the same way the pyscripts do
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
+
+
     # Run the migration
     success = asyncio.run(migrate_to_qdrant_cloud())
     sys.exit(0 if success else 1) 
\ No newline at end of file
@@ -4,7 +4,7 @@
 Folders created:
     raw_menus/2025-08-03/four-lakes-market_lunch_2025-08-03.json
 """
-import os, asyncio, aiohttp, json
+import os, asyncio, aiohttp, orjson
 from datetime import date, timedelta
 from pathlib import Path
 from dotenv import load_dotenv
@@ -36,11 +36,13 @@ def api_url(slug: str, meal: str, d: date) -> str:
             f"/menu-type/{meal}/{d.year}/{d.month:02d}/{d.day:02d}/")
 
 # ── Async fetch --------------------------------------------------------------
-async def fetch(session, slug, meal):
+FETCH_CONCURRENCY = 16   # polite ceiling on simultaneous Nutrislice requests
+
+async def fetch(session, sem, slug, meal):
     url = api_url(slug, meal, sunday)
 
     try:
-        async with session.get(url) as resp:
+        async with sem, session.get(url) as resp:
             if resp.status != 200:
                 print(f"• closed {slug} {meal} (HTTP {resp.status})")
                 return
@@ -66,15 +68,20 @@ async def fetch(session, slug, meal):
 
             # ✅ hall is open – save raw JSON
             out = folder / f"{slug}_{meal}_{sunday}.json"
-            out.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            out.write_bytes(orjson.dumps(data))
             print(f"✓ {out.relative_to(RAW_ROOT)}")
 
     except Exception as e:
         print(f"• error {slug} {meal}: {e}")
         
 async def main():
-    async with aiohttp.ClientSession() as session:
-        tasks = [fetch(session, h, m) for h in HALLS for m in MEALS]
+    # Bounded pool + DNS cache keeps us from hammering Nutrislice (or running
+    # out of FDs) as the hall/meal lists grow
+    connector = aiohttp.TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=20)
+    sem = asyncio.Semaphore(FETCH_CONCURRENCY)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        tasks = [fetch(session, sem, h, m) for h in HALLS for m in MEALS]
         await asyncio.gather(*tasks)
 
 if __name__ == "__main__":
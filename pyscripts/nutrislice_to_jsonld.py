@@ -17,7 +17,9 @@ name pattern `<hall>_<meal>_<date>.json`.
 """
 
 from __future__ import annotations
-import json, os, re, ssl, certifi
+import os, orjson, re, ssl, certifi
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import date, timedelta
 from typing import Tuple, List
@@ -35,9 +37,14 @@ JSONLD_DIR.mkdir(parents=True, exist_ok=True)
 
 # ── helpers ────────────────────────────────────────────────────────────────
 
+# Compiled once: these run inside the per-menu-item loop thousands of times a week
+_SLUG_RE = re.compile(r'[^a-z0-9]+')
+_BAD_TIMES_RE = re.compile(r'prep time|cook time', re.I)
+_WS_RE = re.compile(r'\s+')
+
 def slugify(s: str) -> str:
     """Convert string to URL-friendly slug."""
-    return re.sub(r'[^a-z0-9]+', '-', (s or '').lower()).strip('-')
+    return _SLUG_RE.sub('-', (s or '').lower()).strip('-')
 
 def map_diets(tags: List[str]) -> List[str]:
     """Nutrislice tag → Schema.org Diet URI."""
@@ -47,9 +54,7 @@ def map_diets(tags: List[str]) -> List[str]:
 def clean_description(text: str) -> str:
     if not text:
         return ""
-    for bad in ("prep time", "cook time"):
-        text = re.sub(bad, "", text, flags=re.I)
-    return " ".join(text.split())
+    return _WS_RE.sub(' ', _BAD_TIMES_RE.sub('', text)).strip()
 
 
 def oz_to_g(oz: float | str) -> float:
@@ -72,18 +77,21 @@ def transform_menu(raw_json: dict, hall_slug: str, meal_type: str) -> List[Tuple
             continue
 
         # bucket items by menu/section id
-        items_by_section: dict[str, list] = {}
+        items_by_section: dict[str, list] = defaultdict(list)
         for itm in day.get("menu_items", []):
             if itm.get("is_section_title"):
                 continue
-            items_by_section.setdefault(str(itm.get("menu_id")), []).append(itm)
+            menu_id = itm.get("menu_id")
+            key = menu_id if isinstance(menu_id, str) else str(menu_id)
+            items_by_section[key].append(itm)
 
         for menu_id, meta in sections_info.items():
             # Skip if meta is None or doesn't have the expected structure
             if not meta or not isinstance(meta, dict):
                 print(f"Warning: Invalid meta for menu_id {menu_id} in {hall_slug} {meal_type} {menu_date}: {meta}")
                 continue
-            section_name = meta.get("section_options", {}).get("display_name")
+            sopts = meta.get("section_options")
+            section_name = sopts.get("display_name") if sopts else None
             if not section_name:
                 continue
             items = items_by_section.get(menu_id, [])
@@ -185,25 +193,42 @@ def last_sunday(d: date) -> date:
     return d - timedelta(days=(d.weekday() + 1) % 7)
 
 
+def _process_file(raw_file_path: str) -> None:
+    """Parse, transform and write one weekly dump (runs in a worker process)."""
+    raw_file = Path(raw_file_path)
+    try:
+        parts = raw_file.stem.split("_")  # <hall>_<meal>_<YYYY-MM-DD>
+        if len(parts) < 3:
+            return
+        hall_slug, meal_type = parts[0], parts[1]
+
+        raw = orjson.loads(raw_file.read_bytes())
+        for menu_obj, fname in transform_menu(raw, hall_slug, meal_type):
+            out_path = JSONLD_DIR / fname
+            out_path.write_bytes(orjson.dumps(menu_obj, option=orjson.OPT_INDENT_2))
+            print("Wrote", out_path)
+    except Exception as e:
+        print(f"Error processing {raw_file}: {e}")
+
+
 def main():
     # pick the Sunday that fetch_menu.py used when it created the weekly dumps
     sunday_iso = last_sunday(date.today()).isoformat()
-        # search recursively because weekly dumps live in dated sub‑folders
-    for raw_file in RAW_DIR.rglob(f"*_{sunday_iso}.json"):
-        try:
-            parts = raw_file.stem.split("_")  # <hall>_<meal>_<YYYY-MM-DD>
-            if len(parts) < 3:
-                continue
-            hall_slug, meal_type = parts[0], parts[1]
-
-            raw = json.loads(raw_file.read_text(encoding="utf-8"))
-            for menu_obj, fname in transform_menu(raw, hall_slug, meal_type):
-                out_path = JSONLD_DIR / fname
-                out_path.write_text(json.dumps(menu_obj, ensure_ascii=False, indent=2), encoding="utf-8")
-                print("Wrote", out_path)
-        except Exception as e:
-            print(f"Error processing {raw_file}: {e}")
-            continue
+    # fetch_menu.py always writes into RAW_DIR/<sunday>/, so scan just that
+    # folder instead of rglob'ing every week ever fetched
+    week_dir = RAW_DIR / sunday_iso
+    if not week_dir.is_dir():
+        return
+    suffix = f"_{sunday_iso}.json"
+    with os.scandir(week_dir) as it:
+        raw_files = [entry.path for entry in it
+                     if entry.is_file() and entry.name.endswith(suffix)]
+    if not raw_files:
+        return
+    # The per-file transform is pure CPU with no shared state, so fan the
+    # files out across cores
+    with ProcessPoolExecutor() as ex:
+        list(ex.map(_process_file, raw_files))
 
 
 if __name__ == "__main__":
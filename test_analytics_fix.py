@@ -8,17 +8,31 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'code', 'python'))
 
 from aiohttp import web
+from aiohttp.test_utils import make_mocked_request
 import asyncio
+import functools
 import analytics
 
+
+@functools.lru_cache(maxsize=32)
+def _mock_req(method, path, accept=None, user_agent=None):
+    """Build (and memoize) a mocked request; construction costs hundreds of
+    microseconds and the immutable parts are reusable across cases."""
+    headers = {}
+    if accept:
+        headers['Accept'] = accept
+    if user_agent:
+        headers['User-Agent'] = user_agent
+    return make_mocked_request(method, path, headers=headers)
+
+
 async def test_analytics_functions():
     """Test analytics functions with proper response types"""
     print("🧪 Testing Analytics Functions Locally")
     print("=" * 50)
     
     # Create mock request and response
-    from aiohttp.test_utils import make_mocked_request
-    request = make_mocked_request('GET', '/test', headers={'User-Agent': 'test-agent'})
+    request = _mock_req('GET', '/test', user_agent='test-agent')
     
     # Test 1: Test with StreamResponse (should work)
     print("Test 1: StreamResponse (should work)")
@@ -46,7 +60,7 @@ async def test_analytics_functions():
             return web.Response(text="OK")
         
         # Test middleware with different request types
-        test_request = make_mocked_request('GET', '/static/test.html', headers={'Accept': 'text/html'})
+        test_request = _mock_req('GET', '/static/test.html', accept='text/html')
         
         response = await analytics.analytics_middleware(test_request, mock_handler)
         print(f"✅ Middleware test passed: {response.status}")
@@ -10,8 +10,22 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'code', 'python'))
 from aiohttp import web
 from aiohttp.test_utils import make_mocked_request
 import asyncio
+import functools
 import analytics
 
+
+@functools.lru_cache(maxsize=32)
+def _mock_req(method, path, accept=None, user_agent=None):
+    """Build (and memoize) a mocked request; construction costs hundreds of
+    microseconds and the immutable parts are reusable across cases."""
+    headers = {}
+    if accept:
+        headers['Accept'] = accept
+    if user_agent:
+        headers['User-Agent'] = user_agent
+    return make_mocked_request(method, path, headers=headers)
+
+
 async def test_complete_system():
     """Test the complete analytics system"""
     print("🧪 Testing Complete Analytics System Integration")
@@ -32,7 +46,7 @@ async def test_complete_system():
         ]
         
         for method, path, content_type in test_cases:
-            test_request = make_mocked_request(method, path, headers={'Accept': content_type})
+            test_request = _mock_req(method, path, accept=content_type)
             response = await analytics.analytics_middleware(test_request, mock_handler)
             print(f"✅ {method} {path}: {response.status}")
         
@@ -42,7 +56,7 @@ async def test_complete_system():
     # Test 2: Analytics functions with different response types
     print("\nTest 2: Analytics Functions with Different Response Types")
     try:
-        request = make_mocked_request('GET', '/test', headers={'User-Agent': 'test-agent'})
+        request = _mock_req('GET', '/test', user_agent='test-agent')
         
         # Test with StreamResponse
         stream_response = web.StreamResponse()
@@ -68,7 +82,7 @@ async def test_complete_system():
         async def error_handler(req):
             raise Exception("Simulated error")
         
-        test_request = make_mocked_request('GET', '/error', headers={'Accept': 'text/html'})
+        test_request = _mock_req('GET', '/error', accept='text/html')
         
         try:
             response = await analytics.analytics_middleware(test_request, error_handler)
@@ -6,60 +6,52 @@ This script tests the BigQuery views once data is available.
 Run this after deploying your application and generating some traffic.
 """
 
-import subprocess
-import json
-from datetime import datetime
-
-def test_view_exists(view_name):
-    """Test if a BigQuery view exists"""
-    print(f"🔍 Testing view: {view_name}")
-    
-    try:
-        result = subprocess.run([
-            'bq', 'show', f'askbucky-469317:askbucky_analytics.{view_name}'
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print(f"✅ View {view_name} exists")
-            return True
-        else:
-            print(f"❌ View {view_name} not found: {result.stderr}")
-            return False
-    except Exception as e:
-        print(f"❌ Error testing view {view_name}: {e}")
-        return False
+import asyncio
+
+from google.cloud import bigquery
+
+PROJECT = 'askbucky-469317'
+DATASET = 'askbucky_analytics'
+
+# One authenticated client for the whole run; the old bq-CLI path paid a
+# process spawn plus auth handshake (1-3s) for every single check
+client = bigquery.Client(project=PROJECT)
+
+# Storage Read API streams results as Arrow record batches instead of JSON
+# rows; optional - to_arrow falls back to the REST path when it's absent
+try:
+    from google.cloud import bigquery_storage
+    bqstorage_client = bigquery_storage.BigQueryReadClient()
+except ImportError:
+    bqstorage_client = None
+
 
-def test_view_data(view_name, limit=5):
+async def test_view_data(view_name, limit=5):
     """Test if a view has data"""
     print(f"📊 Testing data in view: {view_name}")
-    
+
+    query = f'SELECT * FROM `{PROJECT}.{DATASET}.{view_name}` LIMIT {limit}'
+    loop = asyncio.get_running_loop()
     try:
-        query = f'SELECT * FROM `askbucky-469317.askbucky_analytics.{view_name}` LIMIT {limit}'
-        
-        result = subprocess.run([
-            'bq', 'query', '--use_legacy_sql=false', '--format=json', query
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            if data:
-                print(f"✅ View {view_name} has {len(data)} rows")
-                return True
-            else:
-                print(f"⚠️  View {view_name} exists but has no data")
-                return False
+        rows = await loop.run_in_executor(
+            None,
+            lambda: client.query(query).result().to_arrow(
+                bqstorage_client=bqstorage_client))
+        if rows.num_rows:
+            print(f"✅ View {view_name} has {rows.num_rows} rows")
+            return True
         else:
-            print(f"❌ Error querying view {view_name}: {result.stderr}")
+            print(f"⚠️  View {view_name} exists but has no data")
             return False
     except Exception as e:
         print(f"❌ Error testing data in {view_name}: {e}")
         return False
 
-def test_main_views():
+async def test_main_views():
     """Test the main views for Looker Studio"""
     print("🚀 Testing Looker Studio Views")
     print("=" * 50)
-    
+
     views_to_test = [
         'events_flat',
         'v_latency_daily',
@@ -68,32 +60,47 @@ def test_main_views():
         'v_lifetime_users',
         'v_conversion_daily'
     ]
-    
-    results = {}
-    
-    for view in views_to_test:
-        exists = test_view_exists(view)
-        if exists:
-            has_data = test_view_data(view)
-            results[view] = has_data
-        else:
-            results[view] = False
-        print()
-    
+
+    # One list_tables call answers every existence question; membership is
+    # then a set lookup instead of a get_table round trip per view
+    loop = asyncio.get_running_loop()
+    try:
+        existing = await loop.run_in_executor(
+            None,
+            lambda: {t.table_id
+                     for t in client.list_tables(f'{PROJECT}.{DATASET}')})
+    except Exception as e:
+        print(f"❌ Error listing dataset tables: {e}")
+        existing = set()
+
+    async def check(view):
+        print(f"🔍 Testing view: {view}")
+        if view not in existing:
+            print(f"❌ View {view} not found")
+            return False
+        print(f"✅ View {view} exists")
+        return await test_view_data(view)
+
+    # The data checks are independent round trips; run them concurrently so
+    # the wall time is one query latency instead of N
+    outcomes = await asyncio.gather(*[check(v) for v in views_to_test])
+    results = dict(zip(views_to_test, outcomes))
+
     # Summary
+    print()
     print("=" * 50)
     print("📋 VIEW TEST SUMMARY")
     print("=" * 50)
-    
+
     passed = sum(results.values())
     total = len(results)
-    
+
     for view, result in results.items():
         status = "✅ READY" if result else "❌ NOT READY"
         print(f"{view}: {status}")
-    
+
     print(f"\nOverall: {passed}/{total} views ready for Looker Studio")
-    
+
     if passed >= 3:
         print("\n🎉 Your views are ready for Looker Studio!")
         print("\nNext steps:")
@@ -111,14 +118,14 @@ def test_main_views():
         print("3. Wait 5-10 minutes for data to appear")
         print("4. Run: python verify_bigquery_setup.py")
         print("5. Then run: bq query --use_legacy_sql=false < setup_looker_views_ready.sql")
-    
+
     return passed >= 3
 
-def test_sample_queries():
+async def test_sample_queries():
     """Test sample queries that will be used in Looker Studio"""
     print("\n🔍 Testing Sample Looker Studio Queries")
     print("=" * 50)
-    
+
     queries = {
         "Lifetime Unique Users": '''
         SELECT COUNT(DISTINCT user_id) AS lifetime_unique_users
@@ -126,16 +133,16 @@ def test_sample_queries():
         WHERE event_name IN ('page_view','ask_answered')
           AND user_id IS NOT NULL
         ''',
-        
+
         "Today's DAU": '''
         SELECT COUNT(DISTINCT user_id) AS dau
         FROM `askbucky-469317.askbucky_analytics.events_flat`
         WHERE event_name IN ('page_view', 'ask_answered')
           AND event_date = CURRENT_DATE()
         ''',
-        
+
         "Recent Performance": '''
-        SELECT 
+        SELECT
           event_date,
           AVG(latency_ms) AS avg_latency_ms,
           COUNT(*) AS total_requests
@@ -147,36 +154,48 @@ def test_sample_queries():
         LIMIT 7
         '''
     }
-    
-    for query_name, query in queries.items():
-        print(f"\n📊 Testing: {query_name}")
-        try:
-            result = subprocess.run([
-                'bq', 'query', '--use_legacy_sql=false', '--format=json', query
-            ], capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                data = json.loads(result.stdout)
-                if data:
-                    print(f"✅ Query successful: {len(data)} rows returned")
-                    # Show first row as sample
-                    if len(data) > 0:
-                        print(f"   Sample: {data[0]}")
-                else:
-                    print("⚠️  Query successful but no data returned")
-            else:
-                print(f"❌ Query failed: {result.stderr}")
-        except Exception as e:
-            print(f"❌ Error running query: {e}")
 
-if __name__ == "__main__":
-    import sys
-    
+    # Submit all three as one multi-statement script: BigQuery runs each
+    # statement as a child job of a single submission, so we pay job dispatch
+    # and auth once instead of per query. The injected `q` column carries the
+    # query name because child-job listing order is not the statement order.
+    def run_script():
+        script = "\n".join(
+            f"SELECT '{name}' AS q, * FROM ({q});"
+            for name, q in queries.items())
+        parent = client.query(script)
+        parent.result()
+        return [
+            child.result().to_arrow(bqstorage_client=bqstorage_client)
+            for child in client.list_jobs(parent_job=parent.job_id)
+        ]
+
+    loop = asyncio.get_running_loop()
+    try:
+        tables = await loop.run_in_executor(None, run_script)
+    except Exception as e:
+        print(f"❌ Error running sample queries: {e}")
+        return
+
+    for rows in tables:
+        if rows.num_rows:
+            sample = rows.to_pylist()[0]
+            print(f"\n📊 {sample.pop('q')}")
+            print(f"✅ Query successful: {rows.num_rows} rows returned")
+            print(f"   Sample: {sample}")
+        else:
+            print("\n⚠️  Query successful but no data returned")
+
+async def main():
     # Test main views
-    views_ready = test_main_views()
-    
+    views_ready = await test_main_views()
+
     # Test sample queries if views are ready
     if views_ready:
-        test_sample_queries()
-    
-    sys.exit(0 if views_ready else 1) 
\ No newline at end of file
+        await test_sample_queries()
+
+    return views_ready
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(0 if asyncio.run(main()) else 1)
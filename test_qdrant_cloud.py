@@ -6,9 +6,14 @@ Test script to verify Qdrant Cloud connection and basic operations.
 import asyncio
 import os
 import sys
+import numpy as np
 from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
 
+# One contiguous float32 buffer shared by every point and the search query;
+# qdrant-client serializes numpy arrays directly without boxing each element
+TEST_VEC = np.full(1536, 0.1, dtype=np.float32)
+
 # Add the code/python directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'code', 'python'))
 
@@ -30,23 +35,26 @@ async def test_qdrant_cloud():
     print(f"🔗 Connecting to Qdrant Cloud at: {qdrant_url}")
     
     try:
-        # Create client
-        client = AsyncQdrantClient(url=qdrant_url, api_key=qdrant_api_key)
-        
-        # Test connection by getting collections
-        collections = await client.get_collections()
+        # Create client; gRPC skips per-call HTTP framing and reuses one channel
+        client = AsyncQdrantClient(url=qdrant_url, api_key=qdrant_api_key,
+                                   prefer_grpc=True)
+
+        test_collection_name = "test_collection"
+
+        # Overlap the two independent round trips
+        async with asyncio.TaskGroup() as tg:
+            collections_task = tg.create_task(client.get_collections())
+            exists_task = tg.create_task(
+                client.collection_exists(test_collection_name))
+        collections = collections_task.result()
+        test_exists = exists_task.result()
         print(f"✅ Successfully connected to Qdrant Cloud!")
         print(f"📚 Found {len(collections.collections)} collections:")
         
         for collection in collections.collections:
             print(f"   - {collection.name}")
         
-        # Test creating a test collection
-        test_collection_name = "test_collection"
-        
-        # Check if test collection exists
-        collection_names = [c.name for c in collections.collections]
-        if test_collection_name in collection_names:
+        if test_exists:
             print(f"🗑️  Deleting existing test collection: {test_collection_name}")
             await client.delete_collection(test_collection_name)
         
@@ -60,27 +68,37 @@ async def test_qdrant_cloud():
             )
         )
         
-        # Test inserting a point
-        test_point = models.PointStruct(
-            id=1,  # Use integer ID instead of string
-            vector=[0.1] * 1536,  # Simple test vector
-            payload={"test": "data", "message": "Hello from AskBucky!"}
-        )
-        
-        print("📤 Inserting test point...")
+        # Test inserting a batch of points in one call - this is how the
+        # loaders write, and it amortizes the round trip across points
+        batch_size = 256
+        test_points = [
+            models.PointStruct(
+                id=i,  # Use integer IDs instead of strings
+                vector=TEST_VEC,
+                payload={"test": "data", "message": "Hello from AskBucky!", "n": i}
+            )
+            for i in range(batch_size)
+        ]
+
+        print(f"📤 Inserting {batch_size} test points in one upsert...")
         await client.upsert(
             collection_name=test_collection_name,
-            points=[test_point]
+            points=test_points
         )
         
-        # Test searching
+        # Test searching; the count probe is an independent read, so let it
+        # ride along on the same round trip window
         print("🔍 Testing search...")
-        search_result = await client.search(
-            collection_name=test_collection_name,
-            query_vector=[0.1] * 1536,
-            limit=1
+        search_result, point_count = await asyncio.gather(
+            client.search(
+                collection_name=test_collection_name,
+                query_vector=TEST_VEC,
+                limit=1
+            ),
+            client.count(test_collection_name)
         )
-        
+        print(f"📈 Collection holds {point_count.count} points")
+
         if search_result:
             print(f"✅ Search successful! Found {len(search_result)} results")
             print(f"   First result payload: {search_result[0].payload}")
@@ -99,19 +117,10 @@ async def test_qdrant_cloud():
         return False
 
 if __name__ == "__main__":
-    # Load environment variables from .env file if it exists
-    env_file = os.path.join(os.path.dirname(__file__), '.env')
-    if os.path.exists(env_file):
-        print("📄 Loading environment variables from .env file...")
-        with open(env_file, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    # Remove quotes if present
-                    value = value.strip('"\'')
-                    os.environ[key] = value
-    
+    # Load environment variables from .env the same way the pyscripts do
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
+
     # Run the test
     success = asyncio.run(test_qdrant_cloud())
     sys.exit(0 if success else 1) 
\ No newline at end of file
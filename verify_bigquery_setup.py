@@ -6,26 +6,83 @@ This script verifies that the BigQuery analytics setup is working correctly
 after the application has been deployed to Cloud Run.
 """
 
-import subprocess
-import json
+import functools
+import io
+import sys
+import threading
 import time
+import concurrent.futures
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Callable
+
+from google.api_core.exceptions import NotFound
+from google.cloud import bigquery
+from google.cloud import logging_v2
+
+from _queries import cloud_log_events_filter
+
+# In-process clients replace the bq/gcloud CLIs: no interpreter spawn or
+# re-auth per call, and every check reuses the same authenticated channel.
+# lru_cache makes them lazy singletons - ADC credential discovery happens
+# once, on the first check that needs it, not at import time.
+@functools.lru_cache(maxsize=1)
+def _bq() -> bigquery.Client:
+    return bigquery.Client(project='askbucky-469317')
+
+
+@functools.lru_cache(maxsize=1)
+def _log() -> logging_v2.Client:
+    return logging_v2.Client(project='askbucky-469317')
+
+@dataclass
+class _Check:
+    """One verification step; deps name checks that must pass first."""
+    name: str
+    fn: Callable[[], bool]
+    deps: tuple = ()
+
+
+class _ThreadLocalStdout:
+    """stdout proxy that routes print() into a per-thread buffer.
+
+    The checks below run concurrently and all print progress lines; buffering
+    each check's output and flushing it in one piece keeps the report from
+    interleaving across threads.
+    """
+
+    def __init__(self, real):
+        self._real = real
+        self._local = threading.local()
+
+    def capture(self):
+        self._local.buf = io.StringIO()
+
+    def release(self):
+        buf = self._local.buf
+        self._local.buf = None
+        return buf.getvalue()
+
+    def write(self, s):
+        buf = getattr(self._local, 'buf', None)
+        (buf if buf is not None else self._real).write(s)
+
+    def flush(self):
+        if getattr(self._local, 'buf', None) is None:
+            self._real.flush()
+
 
 def check_bigquery_dataset():
     """Check if BigQuery dataset exists"""
     print("🔍 Checking BigQuery dataset...")
     
     try:
-        result = subprocess.run([
-            'bq', 'show', 'askbucky-469317:askbucky_analytics'
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("✅ BigQuery dataset exists")
-            return True
-        else:
-            print(f"❌ BigQuery dataset not found: {result.stderr}")
-            return False
+        _bq().get_dataset('askbucky_analytics')
+        print("✅ BigQuery dataset exists")
+        return True
+    except NotFound:
+        print("❌ BigQuery dataset not found")
+        return False
     except Exception as e:
         print(f"❌ Error checking BigQuery dataset: {e}")
         return False
@@ -35,19 +92,14 @@ def check_logging_sink():
     print("\n🔍 Checking Cloud Logging sink...")
     
     try:
-        result = subprocess.run([
-            'gcloud', 'logging', 'sinks', 'describe', 'events-to-bq',
-            '--format=json'
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            sink_info = json.loads(result.stdout)
-            print(f"✅ Logging sink exists: {sink_info.get('name', 'unknown')}")
-            print(f"   Destination: {sink_info.get('destination', 'unknown')}")
-            return True
-        else:
-            print(f"❌ Logging sink not found: {result.stderr}")
-            return False
+        sink = _log().sink('events-to-bq')
+        sink.reload()
+        print(f"✅ Logging sink exists: {sink.name}")
+        print(f"   Destination: {sink.destination}")
+        return True
+    except NotFound:
+        print("❌ Logging sink not found")
+        return False
     except Exception as e:
         print(f"❌ Error checking logging sink: {e}")
         return False
@@ -58,77 +110,80 @@ def check_cloud_logging_events():
     
     try:
         # Check for events in the last hour
-        query = '''
-        resource.type="cloud_run_revision"
-        AND resource.labels.service_name="askbucky"
-        AND jsonPayload.type="event"
-        AND timestamp>="2025-08-26T00:00:00Z"
-        '''
-        
-        result = subprocess.run([
-            'gcloud', 'logging', 'read', query,
-            '--limit=10',
-            '--format=json'
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            events = json.loads(result.stdout)
-            if events:
-                print(f"✅ Found {len(events)} analytics events in Cloud Logging")
-                for event in events[:3]:
-                    payload = event.get('jsonPayload', {})
-                    print(f"   - {payload.get('event_name', 'unknown')} at {payload.get('event_time', 'unknown')}")
-                return True
-            else:
-                print("⚠️  No analytics events found in Cloud Logging")
-                print("   This is normal if the app hasn't been deployed or used yet")
-                return False
+        events = list(_log().list_entries(
+            filter_=cloud_log_events_filter(), page_size=10, max_results=10))
+
+        if events:
+            print(f"✅ Found {len(events)} analytics events in Cloud Logging")
+            for event in events[:3]:
+                payload = event.payload or {}
+                print(f"   - {payload.get('event_name', 'unknown')} at {payload.get('event_time', 'unknown')}")
+            return True
         else:
-            print(f"❌ Error querying Cloud Logging: {result.stderr}")
+            print("⚠️  No analytics events found in Cloud Logging")
+            print("   This is normal if the app hasn't been deployed or used yet")
             return False
     except Exception as e:
         print(f"❌ Error checking Cloud Logging: {e}")
         return False
 
+# Both event checks hit the same table; a tagged UNION answers them in one
+# bq invocation, so the CLI cold start and auth handshake are paid once
+_COMBINED_BQ_SQL = '''
+SELECT 'event_count' AS k, CAST(COUNT(*) AS STRING) AS v
+FROM `askbucky-469317.askbucky_analytics._AllLogs`
+WHERE jsonPayload.type = 'event'
+  AND TIMESTAMP(jsonPayload.event_time) >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 1 HOUR)
+UNION ALL
+SELECT 'lifetime_unique_users', CAST(COUNT(DISTINCT jsonPayload.user_id) AS STRING)
+FROM `askbucky-469317.askbucky_analytics._AllLogs`
+WHERE jsonPayload.type = 'event'
+  AND jsonPayload.event_name IN ('page_view','ask_answered')
+  AND jsonPayload.user_id IS NOT NULL
+'''
+
+_bq_combined_lock = threading.Lock()
+_bq_combined = None
+
+
+def _run_combined_bq_query():
+    """Run the combined verification query once and cache the tagged rows.
+
+    The checks run concurrently, so the first caller does the work under a
+    lock and the rest read the cached {tag: value} dict.
+    """
+    global _bq_combined
+    with _bq_combined_lock:
+        if _bq_combined is None:
+            try:
+                rows = _bq().query(_COMBINED_BQ_SQL).result()
+            except Exception as e:
+                raise RuntimeError(str(e)) from e
+            _bq_combined = {row['k']: row['v'] for row in rows}
+    return _bq_combined
+
+
 def check_bigquery_events():
     """Check for analytics events in BigQuery"""
     print("\n🔍 Checking BigQuery for analytics events...")
     
     try:
         # First check if the table exists
-        result = subprocess.run([
-            'bq', 'ls', 'askbucky-469317:askbucky_analytics'
-        ], capture_output=True, text=True)
-        
-        if result.returncode != 0:
+        tables = list(_bq().list_tables('askbucky-469317.askbucky_analytics'))
+        if not tables:
             print("⚠️  No tables found in BigQuery dataset")
             print("   This is normal if no events have been logged yet")
             return False
         
-        # Check for events in the last hour
-        query = '''
-        SELECT COUNT(*) as event_count
-        FROM `askbucky-469317.askbucky_analytics._AllLogs`
-        WHERE jsonPayload.type = 'event'
-          AND TIMESTAMP(jsonPayload.event_time) >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL 1 HOUR)
-        '''
-        
-        result = subprocess.run([
-            'bq', 'query', '--use_legacy_sql=false', '--format=json', query
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            if data:
-                count = data[0].get('event_count', 0)
-                print(f"✅ Found {count} analytics events in BigQuery (last hour)")
-                return True
-            else:
-                print("⚠️  No recent events in BigQuery")
-                return False
-        else:
-            print(f"❌ Error querying BigQuery: {result.stderr}")
+        try:
+            counts = _run_combined_bq_query()
+        except RuntimeError as e:
+            print(f"❌ Error querying BigQuery: {e}")
             return False
+
+        count = counts.get('event_count', '0')
+        print(f"✅ Found {count} analytics events in BigQuery (last hour)")
+        return True
     except Exception as e:
         print(f"❌ Error checking BigQuery: {e}")
         return False
@@ -138,87 +193,115 @@ def test_lifetime_users_query():
     print("\n🔍 Testing lifetime users query...")
     
     try:
-        query = '''
-        SELECT COUNT(DISTINCT jsonPayload.user_id) AS lifetime_unique_users
-        FROM `askbucky-469317.askbucky_analytics._AllLogs`
-        WHERE jsonPayload.type = 'event'
-          AND jsonPayload.event_name IN ('page_view','ask_answered')
-          AND jsonPayload.user_id IS NOT NULL
-        '''
-        
-        result = subprocess.run([
-            'bq', 'query', '--use_legacy_sql=false', '--format=json', query
-        ], capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            if data:
-                users = data[0].get('lifetime_unique_users', 0)
-                print(f"✅ Lifetime unique users: {users}")
-                return True
-            else:
-                print("⚠️  No data returned from lifetime users query")
-                return False
-        else:
-            print(f"❌ Error running lifetime users query: {result.stderr}")
+        try:
+            counts = _run_combined_bq_query()
+        except RuntimeError as e:
+            print(f"❌ Error running lifetime users query: {e}")
             return False
+
+        users = counts.get('lifetime_unique_users', '0')
+        print(f"✅ Lifetime unique users: {users}")
+        return True
     except Exception as e:
         print(f"❌ Error testing lifetime users query: {e}")
         return False
 
 def main():
     """Run all verification checks"""
-    print("🚀 BigQuery Setup Verification")
-    print("=" * 50)
+    print("🚀 BigQuery Setup Verification\n" + "=" * 50)
     
+    # Both event queries are pointless without the dataset, so they hang off
+    # the dataset probe; siblings within a wave still run concurrently.
     checks = [
-        ("BigQuery Dataset", check_bigquery_dataset),
-        ("Cloud Logging Sink", check_logging_sink),
-        ("Cloud Logging Events", check_cloud_logging_events),
-        ("BigQuery Events", check_bigquery_events),
-        ("Lifetime Users Query", test_lifetime_users_query),
+        _Check("BigQuery Dataset", check_bigquery_dataset),
+        _Check("Cloud Logging Sink", check_logging_sink),
+        _Check("Cloud Logging Events", check_cloud_logging_events),
+        _Check("BigQuery Events", check_bigquery_events,
+               deps=("BigQuery Dataset",)),
+        _Check("Lifetime Users Query", test_lifetime_users_query,
+               deps=("BigQuery Dataset",)),
     ]
-    
+
     results = {}
-    
-    for check_name, check_func in checks:
+    pending = list(checks)
+
+    real_stdout = sys.stdout
+    proxy = _ThreadLocalStdout(real_stdout)
+
+    def run_buffered(check_fn):
+        proxy.capture()
         try:
-            results[check_name] = check_func()
-        except Exception as e:
-            print(f"❌ {check_name} check failed with error: {e}")
-            results[check_name] = False
-    
-    # Summary
-    print("\n" + "=" * 50)
-    print("📋 VERIFICATION SUMMARY")
-    print("=" * 50)
-    
-    passed = sum(results.values())
-    total = len(results)
+            return check_fn()
+        finally:
+            real_stdout.write(proxy.release())
+            real_stdout.flush()
+
+    # Evaluate the DAG wave by wave: checks whose dependencies have all
+    # settled run concurrently; anything downstream of a failure is skipped
+    # rather than left to fail slowly with the same root cause.
+    sys.stdout = proxy
+    try:
+        while pending:
+            ready = [c for c in pending if all(d in results for d in c.deps)]
+            if not ready:
+                raise RuntimeError("unresolvable check dependencies: "
+                                   + ", ".join(c.name for c in pending))
+            pending = [c for c in pending if c not in ready]
+
+            to_run = []
+            for c in ready:
+                if any(results[d] is not True for d in c.deps):
+                    print(f"⏭️  Skipping {c.name}: prerequisite check failed")
+                    results[c.name] = 'SKIP'
+                else:
+                    to_run.append(c)
+            if not to_run:
+                continue
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(to_run)) as executor:
+                futures = {c.name: executor.submit(run_buffered, c.fn)
+                           for c in to_run}
+            for check_name, future in futures.items():
+                try:
+                    results[check_name] = future.result()
+                except Exception as e:
+                    print(f"❌ {check_name} check failed with error: {e}")
+                    results[check_name] = False
+    finally:
+        sys.stdout = real_stdout
     
+    # Summary - accumulated and emitted as one write, so the whole report
+    # costs one syscall instead of one per line
+    lines = ["", "=" * 50, "📋 VERIFICATION SUMMARY", "=" * 50]
+    passed = 0
     for check_name, result in results.items():
-        status = "✅ PASS" if result else "❌ FAIL"
-        print(f"{check_name}: {status}")
-    
-    print(f"\nOverall: {passed}/{total} checks passed")
-    
+        if result == 'SKIP':
+            status = "⏭️  SKIP"
+        else:
+            passed += bool(result)
+            status = "✅ PASS" if result else "❌ FAIL"
+        lines.append(f"{check_name}: {status}")
+    total = len(results)
+    lines.append(f"\nOverall: {passed}/{total} checks passed")
+
     if passed >= 3:  # At least infrastructure checks should pass
-        print("\n🎉 BigQuery setup is working correctly!")
-        print("\nNext steps:")
-        print("1. Deploy your application to Cloud Run")
-        print("2. Generate some user traffic")
-        print("3. Re-run this script to verify events are flowing")
-        print("4. Use the SQL queries in analytics_queries.sql")
+        lines.append("\n🎉 BigQuery setup is working correctly!")
+        lines.append("\nNext steps:")
+        lines.append("1. Deploy your application to Cloud Run")
+        lines.append("2. Generate some user traffic")
+        lines.append("3. Re-run this script to verify events are flowing")
+        lines.append("4. Use the SQL queries in analytics_queries.sql")
     else:
-        print("\n⚠️  Some checks failed. See details above.")
-        print("\nTroubleshooting:")
-        print("1. Ensure the application is deployed to Cloud Run")
-        print("2. Check that the service name is 'askbucky'")
-        print("3. Verify analytics events are being generated")
-        print("4. Wait 5-10 minutes for data to appear in BigQuery")
+        lines.append("\n⚠️  Some checks failed. See details above.")
+        lines.append("\nTroubleshooting:")
+        lines.append("1. Ensure the application is deployed to Cloud Run")
+        lines.append("2. Check that the service name is 'askbucky'")
+        lines.append("3. Verify analytics events are being generated")
+        lines.append("4. Wait 5-10 minutes for data to appear in BigQuery")
+
+    sys.stdout.write('\n'.join(lines) + '\n')
     
     return 0 if passed >= 3 else 1
 
 if __name__ == "__main__":
-    import sys
     sys.exit(main()) 
\ No newline at end of file